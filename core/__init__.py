@@ -0,0 +1,38 @@
+"""Ядро подписи PDF без зависимости от GUI.
+
+Подмодули импортируются при первом обращении к имени: процессы пакетной
+подписи, которым нужен только core.engine, не загружают numpy и кэши
+просмотрщика.
+"""
+import importlib
+
+# Имя -> подмодуль, в котором оно определено
+_EXPORTS = {
+    'BitmapCache': 'bitmap_cache',
+    'DiskCache': 'disk_cache',
+    'Document': 'engine',
+    'Placement': 'engine',
+    'SigningEngine': 'engine',
+    'make_more_blue': 'image_ops',
+    'PageSource': 'page_source',
+    'PrefetchWorker': 'prefetch',
+    'SignatureLibrary': 'signature_library',
+    'SignaturePipeline': 'signature_pipeline',
+    'PlacementTemplate': 'template',
+    'ThumbnailWorker': 'thumbnails',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    # Следующие обращения идут мимо __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+
+
+class BitmapCache:
+    """LRU-кэш растров с ограничением по объёму занимаемой памяти.
+    
+    size_of(image) оценивает объём записи; по умолчанию - изображение PIL.
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024, size_of=None):
+        self.max_bytes = max_bytes
+        self.size_of = size_of or self.image_bytes
+        self.current_bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.RLock()
+        
+        # Счётчики для диагностики
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def image_bytes(image):
+        """Оценка объёма памяти, занимаемого изображением PIL"""
+        return image.width * image.height * len(image.getbands())
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def keys(self):
+        with self._lock:
+            return list(self._items)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, image):
+        size = self.size_of(image)
+        with self._lock:
+            self.discard(key)
+            # Изображение больше всего бюджета не кэшируем
+            if size > self.max_bytes:
+                return
+            self._items[key] = (image, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, old_size) = self._items.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._items.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+
+    def discard_if(self, predicate):
+        """Удаляет все записи, ключи которых удовлетворяют условию"""
+        with self._lock:
+            for key in [k for k in self._items if predicate(k)]:
+                self.discard(key)
+
+    def demote_if(self, predicate):
+        """Переносит записи, ключи которых удовлетворяют условию, в начало очереди вытеснения"""
+        with self._lock:
+            # С конца, чтобы среди перенесённых сохранился порядок LRU
+            for key in reversed([k for k in self._items if predicate(k)]):
+                self._items.move_to_end(key, last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'items': len(self._items),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+            }
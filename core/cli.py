@@ -0,0 +1,149 @@
+import argparse
+import csv
+import glob
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image
+from .engine import Document, SigningEngine
+from .template import PlacementTemplate
+
+REPORT_NAME = "report.csv"
+
+
+def collect_inputs(patterns):
+    """Список PDF по путям, каталогам и glob-шаблонам (без повторов, в порядке появления)"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found = sorted(glob.glob(os.path.join(pattern, "*.pdf")))
+        elif glob.has_magic(pattern):
+            found = sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        else:
+            # Явно указанный файл оставляем, даже если его нет, - ошибка попадёт в отчёт
+            found = [pattern]
+        paths.extend(found)
+    
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def sign_file(input_path, output_path, records, signature, incremental):
+    """Подписывает один файл; выполняется в процессе пула"""
+    started = time.perf_counter()
+    template = PlacementTemplate(records, image=signature)
+    with Document(input_path) as document:
+        SigningEngine().sign(document, template, output_path, incremental=incremental)
+    return time.perf_counter() - started
+
+
+def load_signature(path):
+    """Байты PNG подписи; битый файл отклоняется до запуска пула"""
+    with open(path, "rb") as f:
+        signature = f.read()
+    with Image.open(io.BytesIO(signature)) as img:
+        img.verify()
+    return signature
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"нужно целое число не меньше 1: {value}")
+    return number
+
+
+def run_batch(args):
+    try:
+        template = PlacementTemplate.load(args.template)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Не удалось прочитать шаблон {args.template}: {e}", file=sys.stderr)
+        return 2
+    try:
+        signature = load_signature(args.signature)
+    except (OSError, SyntaxError, ValueError) as e:
+        print(f"Не удалось прочитать подпись {args.signature}: {e}", file=sys.stderr)
+        return 2
+    
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("Нет входных PDF-файлов", file=sys.stderr)
+        return 2
+    
+    os.makedirs(args.output, exist_ok=True)
+    report_path = os.path.join(args.output, REPORT_NAME)
+    failed = 0
+    
+    with open(report_path, "w", newline="", encoding="utf-8") as report_file, \
+            ProcessPoolExecutor(max_workers=args.workers) as pool:
+        report = csv.writer(report_file)
+        report.writerow(["input", "output", "status", "seconds", "error"])
+        
+        futures = {}
+        outputs = set()
+        for input_path in inputs:
+            output_path = os.path.join(args.output, os.path.basename(input_path))
+            if os.path.realpath(output_path) == os.path.realpath(input_path):
+                # -o совпадает с каталогом исходников: не перезаписываем их
+                error = "выходной файл совпадает с исходным"
+            elif output_path in outputs:
+                error = "файл с таким именем уже есть в пакете"
+            else:
+                error = None
+            if error:
+                failed += 1
+                report.writerow([input_path, "", "error", "", error])
+                print(f"FAIL {input_path}: {error}", file=sys.stderr)
+                continue
+            outputs.add(output_path)
+            future = pool.submit(sign_file, input_path, output_path, template.records,
+                                 signature, args.incremental)
+            futures[future] = (input_path, output_path)
+        
+        # Результаты пишутся по мере готовности, а не в конце прогона
+        for future in as_completed(futures):
+            input_path, output_path = futures[future]
+            try:
+                seconds = future.result()
+            except Exception as e:
+                failed += 1
+                report.writerow([input_path, "", "error", "", str(e)])
+                print(f"FAIL {input_path}: {e}", file=sys.stderr)
+            else:
+                report.writerow([input_path, output_path, "ok", f"{seconds:.3f}", ""])
+                print(f"OK   {input_path} -> {output_path}")
+            report_file.flush()
+    
+    print(f"Готово: {len(inputs) - failed} из {len(inputs)}, отчёт: {report_path}")
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pdf-signer", description="Подпись PDF-документов")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    batch = commands.add_parser("batch", help="подписать много PDF по шаблону размещения")
+    batch.add_argument("inputs", nargs="+", help="PDF-файлы, каталоги или glob-шаблоны")
+    batch.add_argument("-t", "--template", required=True, help="шаблон размещения подписей (JSON или TOML)")
+    batch.add_argument("-s", "--signature", required=True, help="PNG с подписью")
+    batch.add_argument("-o", "--output", required=True, help="каталог для подписанных файлов")
+    batch.add_argument("-j", "--workers", type=positive_int, default=os.cpu_count() or 1,
+                       help="число процессов (по умолчанию - по числу ядер)")
+    batch.add_argument("--incremental", action="store_true",
+                       help="копировать исходник без изменений и дописывать подписи "
+                            "в конец копии в каталоге -o (исходные файлы не меняются)")
+    batch.set_defaults(handler=run_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
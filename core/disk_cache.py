@@ -0,0 +1,220 @@
+import hashlib
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from PIL import Image
+
+APP_NAME = "pdf_signer"
+
+
+def default_cache_dir():
+    """Каталог пользовательского кэша: %LOCALAPPDATA% в Windows, XDG_CACHE_HOME в остальных"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, APP_NAME)
+
+
+class DiskCache:
+    """Кэш растров на диске: каждое изображение - отдельный PNG.
+
+    Ключ - любой кортеж с устойчивым repr (хэш содержимого документа, номер
+    страницы, параметры отрисовки); путь к файлу в ключ не входит, поэтому
+    переименованный или скопированный документ попадает в тот же кэш.
+
+    Объём ограничен max_bytes: при переполнении удаляются файлы, к которым
+    дольше всего не обращались (чтение обновляет mtime). Запись атомарна
+    (временный файл + os.replace), поэтому кэш безопасно делят потоки и
+    несколько запущенных экземпляров программы - читатель видит либо целый
+    файл, либо промах.
+    """
+    MAX_BYTES = 1024 * 1024 * 1024
+    # Быстрое сжатие: страница сохраняется за десятки миллисекунд
+    PNG_COMPRESS_LEVEL = 1
+    # Недописанные файлы старше этого возраста остались от упавших процессов
+    STALE_TMP_SECONDS = 3600
+
+    def __init__(self, directory=None, max_bytes=MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Оценка занятого места; None - каталог ещё не сканировался
+        self._total_bytes = None
+        self._hashes = {}
+        self._queue = None
+        self._thread = None
+
+    def _path(self, key, ext=".png"):
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name[:2], name + ext)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with Image.open(path) as img:
+                img.load()
+        except (OSError, SyntaxError, ValueError):
+            # Нет файла или он повреждён - промах
+            return None
+        try:
+            # Отметка для LRU: mtime - время последнего обращения
+            os.utime(path)
+        except OSError:
+            # Файл успели вытеснить из другого процесса - растр уже прочитан
+            pass
+        return img
+
+    def put(self, key, img):
+        """Ставит изображение в очередь на запись - кодирование PNG идёт в фоне"""
+        self._enqueue(self._path(key),
+                      lambda f: img.save(f, "PNG", compress_level=self.PNG_COMPRESS_LEVEL))
+
+    def flush(self):
+        """Дожидается записи всех поставленных в очередь изображений"""
+        if self._queue is not None:
+            self._queue.join()
+
+    def read(self, key):
+        """Небольшие служебные данные (bytes) по ключу или None"""
+        try:
+            with open(self._path(key, ".bin"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def write(self, key, data):
+        self._enqueue(self._path(key, ".bin"), lambda f: f.write(data))
+
+    def document_hash(self, document):
+        """Хэш содержимого документа с запоминанием по (путь, размер, mtime).
+
+        Повторное открытие неизменённого файла не перечитывает его целиком -
+        иначе хэширование многогигабайтного PDF откладывало бы первую страницу.
+        """
+        if not document.path or not document.mapped:
+            return document.content_hash
+
+        stamp = self._hash_stamp(document)
+        content_hash = self._remembered_hash(stamp)
+        if content_hash is None:
+            content_hash = document.content_hash
+            self.write(stamp, content_hash.encode("ascii"))
+            with self._lock:
+                self._hashes[stamp] = content_hash
+        return content_hash
+
+    def known_document_hash(self, document):
+        """Запомненный хэш документа или None - сам файл не читается.
+        
+        Стоит один stat и чтение маленького файла, поэтому годится для
+        главного потока: повторно открытый документ сразу берёт страницы
+        из кэша, а новый хэшируется в фоне (document_hash).
+        """
+        if not document.path or not document.mapped:
+            return None
+        try:
+            return self._remembered_hash(self._hash_stamp(document))
+        except OSError:
+            return None
+
+    @staticmethod
+    def _hash_stamp(document):
+        stat = os.stat(document.path)
+        return ('content_hash', os.path.abspath(document.path), stat.st_size, stat.st_mtime_ns)
+
+    def _remembered_hash(self, stamp):
+        with self._lock:
+            if stamp in self._hashes:
+                return self._hashes[stamp]
+        data = self.read(stamp)
+        if not data:
+            return None
+        content_hash = data.decode("ascii")
+        with self._lock:
+            self._hashes[stamp] = content_hash
+        return content_hash
+
+    def _enqueue(self, path, write):
+        # Запись и вытеснение идут в одном фоновом потоке, не задерживая интерфейс
+        with self._lock:
+            if self._thread is None:
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run_writer, name="disk-cache-writer",
+                                                daemon=True)
+                self._thread.start()
+        self._queue.put((path, write))
+
+    def _run_writer(self):
+        while True:
+            path, write = self._queue.get()
+            try:
+                self._store(path, write)
+            finally:
+                self._queue.task_done()
+
+    def _store(self, path, write):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            size = os.path.getsize(path)
+        except Exception:
+            # Кэш - оптимизация: нет места или прав - работаем без него
+            return
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += size
+            over_budget = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over_budget:
+            self._trim()
+
+    def _scan(self):
+        entries = []
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    if now - stat.st_mtime > self.STALE_TMP_SECONDS:
+                        self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _trim(self):
+        """Удаляет давно не использованные файлы, пока кэш не займёт 90% бюджета"""
+        entries = self._scan()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            target = self.max_bytes * 0.9
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                if self._remove(path):
+                    total -= size
+        with self._lock:
+            self._total_bytes = total
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            # Файл уже удалён другим процессом или открыт (Windows)
+            return False
@@ -0,0 +1,360 @@
+import hashlib
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any
+import fitz
+from PIL import Image
+
+# Размер блока при потоковом копировании и хэшировании исходного файла
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+@dataclass
+class Placement:
+    """Подпись на странице в относительных координатах (0.0-1.0 от размеров страницы).
+    
+    image - путь к файлу, содержимое файла в байтах или PIL.Image.
+    """
+    page: int
+    x_rel: float
+    y_rel: float
+    w_rel: float
+    h_rel: float
+    image: Any
+
+    @classmethod
+    def from_dict(cls, data, image=None):
+        """Создаёт размещение из словаря в формате placed_signatures"""
+        return cls(
+            page=int(data['page']),
+            x_rel=float(data['x_rel']),
+            y_rel=float(data['y_rel']),
+            w_rel=float(data['w_rel']),
+            h_rel=float(data['h_rel']),
+            image=image if image is not None else data.get('image'),
+        )
+
+
+class Document:
+    """PDF-документ для подписи: путь к файлу, байты или бинарный поток.
+    
+    Файл на диске отображается в память один раз (mmap), и все открытия
+    fitz - просмотрщиком и при сохранении - читают один и тот же буфер без
+    копирования. Поток (например, загруженный в сервис файл) читается в
+    память целиком, без временных файлов.
+    """
+    def __init__(self, source):
+        self.path = None
+        self._mmap = None
+        self._docs = []
+        self._content_hash = None
+        # Хэш считается в фоновом потоке: закрытие ждёт, пока буфер читают
+        self._buffer_lock = threading.Lock()
+        
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.buffer = bytes(source)
+        elif hasattr(source, "read"):
+            self.buffer = source.read()
+            name = getattr(source, "name", None)
+            if isinstance(name, str):
+                self.path = name
+        else:
+            self.path = os.fspath(source)
+            self._map()
+
+    def _map(self):
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"Пустой файл: {self.path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self._mmap)
+
+    @property
+    def size(self):
+        return len(self.buffer)
+
+    @property
+    def mapped(self):
+        """True, если буфер - отображение файла self.path"""
+        return self._mmap is not None
+
+    @property
+    def content_hash(self):
+        """Хэш содержимого - ключ дисковых кэшей, не зависящий от пути к файлу"""
+        with self._buffer_lock:
+            if self._content_hash is None:
+                if self.buffer is None:
+                    raise ValueError("Документ закрыт")
+                digest = hashlib.blake2b(digest_size=16)
+                with memoryview(self.buffer) as buffer:
+                    for offset in range(0, len(buffer), COPY_CHUNK_BYTES):
+                        digest.update(buffer[offset:offset + COPY_CHUNK_BYTES])
+                self._content_hash = digest.hexdigest()
+            return self._content_hash
+
+    @property
+    def name(self):
+        if self.path:
+            return os.path.basename(self.path)
+        return "document.pdf"
+
+    def open_fitz(self):
+        """Новый документ fitz поверх общего буфера"""
+        if self.buffer is None:
+            raise ValueError("Документ закрыт")
+        doc = fitz.open(stream=self.buffer, filetype="pdf")
+        self._docs = [d for d in self._docs if not d.is_closed]
+        self._docs.append(doc)
+        return doc
+
+    def close(self):
+        """Освобождает отображение файла.
+        
+        fitz хранит на буфер сырой указатель, поэтому сначала закрываются
+        все открытые поверх него документы.
+        """
+        for doc in self._docs:
+            if not doc.is_closed:
+                doc.close()
+        self._docs = []
+        with self._buffer_lock:
+            if self._mmap is not None:
+                self.buffer.release()
+                self._mmap.close()
+                self._mmap = None
+            self.buffer = None
+
+    def reopen(self):
+        """Заново отображает файл self.path после его замены на диске.
+        
+        Документы fitz, открытые поверх старого буфера, закрываются - их
+        нужно открыть снова через open_fitz.
+        """
+        if not self.path:
+            raise ValueError("Документ не связан с файлом")
+        self.close()
+        self._content_hash = None
+        self._map()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def placement_rect(page, placement):
+    """Прямоугольник подписи на странице fitz.
+    
+    Относительные координаты задаются от видимой (повёрнутой) страницы, как
+    её показывает просмотрщик, а fitz вставляет содержимое в координатах
+    неповёрнутой страницы - поэтому прямоугольник переводится обратно.
+    """
+    rect = page.rect
+    visible = fitz.Rect(
+        placement.x_rel * rect.width,
+        placement.y_rel * rect.height,
+        (placement.x_rel + placement.w_rel) * rect.width,
+        (placement.y_rel + placement.h_rel) * rect.height,
+    )
+    return visible * page.derotation_matrix
+
+
+def _image_source(image):
+    """Аргументы insert_image для пути к файлу, байтов или PIL.Image"""
+    if isinstance(image, Image.Image):
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG")
+        return {'stream': buffer.getvalue()}
+    if isinstance(image, (bytes, bytearray)):
+        return {'stream': bytes(image)}
+    return {'filename': os.fspath(image)}
+
+
+def _image_key(image):
+    if isinstance(image, Image.Image):
+        return ('image', id(image))
+    if isinstance(image, (bytes, bytearray)):
+        return ('bytes', hashlib.blake2b(image, digest_size=16).digest())
+    return ('file', os.path.abspath(os.fspath(image)))
+
+
+class SigningEngine:
+    """Накладывает подписи на PDF без зависимости от GUI"""
+    def sign(self, document, placements, output=None, incremental=False, progress=None):
+        """Подписывает документ.
+        
+        document - Document, путь, байты PDF или бинарный поток.
+        placements - список Placement или шаблон с методом resolve(page_count).
+        output - путь, бинарный поток или None (тогда возвращаются байты PDF).
+        При incremental=True исходные байты копируются без изменений, а в конец
+        дописываются только новые объекты подписей и секция xref - время
+        сохранения зависит от числа подписей, а не от размера файла, и
+        существующие цифровые подписи остаются действительными. Исходник
+        копируется блоками, а страницы загружаются по одной, поэтому память
+        ограничена самой большой подписываемой страницей, а не документом.
+        progress(stage, done, total) вызывается на этапах "copy" (байты),
+        "stamp" (страницы) и "write".
+        Если output - сам отображённый файл документа, на время подмены файла
+        отображение снимается (Document.reopen): открытые поверх document
+        документы fitz после этого закрыты.
+        """
+        if not isinstance(document, Document):
+            # Временный Document для пути, байтов или потока закрываем сами
+            with Document(document) as owned:
+                return self.sign(owned, placements, output, incremental, progress)
+        
+        if incremental:
+            return self._sign_incremental(document, placements, output, progress)
+        
+        doc = document.open_fitz()
+        try:
+            self._stamp(doc, placements, progress)
+            if progress:
+                progress("write", 0, 1)
+            result = self._write(doc, output, document)
+            if progress:
+                progress("write", 1, 1)
+            return result
+        finally:
+            if not doc.is_closed:
+                doc.close()
+
+    def _stamp(self, doc, placements, progress=None):
+        # Шаблон с селекторами страниц разворачивается под конкретный документ
+        if hasattr(placements, 'resolve'):
+            placements = placements.resolve(doc.page_count)
+        
+        for placement in placements:
+            if not 0 <= placement.page < doc.page_count:
+                raise ValueError(f"Страница {placement.page + 1} вне документа "
+                                 f"({doc.page_count} стр.)")
+        
+        placements_by_page = {}
+        for placement in placements:
+            placements_by_page.setdefault(placement.page, []).append(placement)
+        
+        # Каждое изображение встраивается один раз (вместе с SMask),
+        # остальные размещения ссылаются на тот же XObject по xref
+        xrefs = {}
+        # Страницы обходятся по порядку и загружаются по одной
+        for done, page_index in enumerate(sorted(placements_by_page), 1):
+            page = doc[page_index]
+            for placement in placements_by_page[page_index]:
+                key = _image_key(placement.image)
+                if key in xrefs:
+                    source = {'xref': xrefs[key]}
+                else:
+                    source = _image_source(placement.image)
+                xrefs[key] = page.insert_image(placement_rect(page, placement), keep_proportion=False,
+                                               rotate=page.rotation, **source)
+            if progress:
+                progress("stamp", done, len(placements_by_page))
+
+    def _sign_incremental(self, document, placements, output, progress=None):
+        if output is None or hasattr(output, "write"):
+            # fitz дописывает инкрементально только в файл на диске
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                tmp_path = os.path.join(tmp_dir, document.name)
+                self._sign_incremental(document, placements, tmp_path, progress)
+                with open(tmp_path, "rb") as f:
+                    if output is None:
+                        return f.read()
+                    shutil.copyfileobj(f, output)
+                    return None
+        
+        copied = not _same_file(document.path, output)
+        try:
+            if copied:
+                self._copy(document, output, progress)
+            self._append_signatures(output, placements, progress, document)
+        except Exception:
+            # Не оставляем на диске копию без подписей
+            if copied and os.path.exists(output):
+                os.remove(output)
+            raise
+        return None
+
+    def _copy(self, document, output, progress=None):
+        # Буфер режется срезами memoryview - без промежуточных копий
+        with memoryview(document.buffer) as buffer, open(output, "wb") as dst:
+            total = len(buffer)
+            for offset in range(0, total, COPY_CHUNK_BYTES):
+                dst.write(buffer[offset:offset + COPY_CHUNK_BYTES])
+                if progress:
+                    progress("copy", min(offset + COPY_CHUNK_BYTES, total), total)
+
+    def _append_signatures(self, path, placements, progress=None, document=None):
+        tmp_path = os.fspath(path) + ".tmp"
+        try:
+            doc = fitz.open(path)
+            try:
+                self._stamp(doc, placements, progress)
+                if progress:
+                    progress("write", 0, 1)
+                rewrite = not doc.can_save_incrementally()
+                if rewrite:
+                    # Повреждённый xref: дописать нельзя, сохраняем документ целиком
+                    # во временный файл рядом - без копии всего PDF в памяти
+                    doc.save(tmp_path, deflate=True)
+                else:
+                    doc.save(path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, deflate=True)
+            finally:
+                # fitz держит path открытым - закрываем до подмены файла
+                doc.close()
+            if rewrite:
+                _replace_file(tmp_path, path, document)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if progress:
+            progress("write", 1, 1)
+
+    def _write(self, doc, output, document=None):
+        if output is None:
+            return doc.tobytes(deflate=True)
+        if hasattr(output, "write"):
+            output.write(doc.tobytes(deflate=True))
+            return None
+        if document is not None and _same_file(document.path, output):
+            # Исходник отображён в память: пишем рядом и подменяем файл,
+            # чтобы не обрезать страницы, которые fitz ещё читает из буфера
+            tmp_path = os.fspath(output) + ".tmp"
+            try:
+                doc.save(tmp_path, deflate=True)
+                doc.close()
+                _replace_file(tmp_path, output, document)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return None
+        doc.save(output, deflate=True)
+        return None
+
+
+def _replace_file(tmp_path, path, document=None):
+    """os.replace(tmp_path, path), снимающий на время замены отображение document.
+    
+    Windows не даёт заменить или обрезать файл, пока он отображён в память,
+    поэтому отображение закрывается, а после замены document отображает
+    уже новое содержимое (или прежнее, если заменить не удалось).
+    """
+    if document is None or not document.mapped or not _same_file(document.path, path):
+        os.replace(tmp_path, path)
+        return
+    document.close()
+    try:
+        os.replace(tmp_path, path)
+    finally:
+        document.reopen()
+
+
+def _same_file(path, other):
+    if not path or not other:
+        return False
+    return os.path.abspath(os.fspath(path)) == os.path.abspath(os.fspath(other))
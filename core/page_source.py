@@ -0,0 +1,247 @@
+import itertools
+import math
+import threading
+import fitz
+from PIL import Image
+from .bitmap_cache import BitmapCache
+from .engine import Document
+
+_source_ids = itertools.count(1)
+
+
+class PageSource:
+    """Ленивый источник страниц PDF: растеризует страницу только по запросу"""
+    # Шаг квантования масштаба для ключей кэша
+    ZOOM_STEP = 0.01
+    # Сторона квадратного тайла при отрисовке по частям
+    TILE_SIZE = 512
+
+    def __init__(self, source, dpi=150, cache=None, disk_cache=None):
+        # Document передаётся извне, чтобы просмотрщик и сохранение делили
+        # один буфер; путь, байты или поток оборачиваются здесь
+        self.owns_document = not isinstance(source, Document)
+        self.document = Document(source) if self.owns_document else source
+        self.doc = self.document.open_fitz()
+        self.dpi = dpi
+        
+        # Отрисованные страницы живут в общем LRU-кэше с ограничением памяти
+        self.cache = cache if cache is not None else BitmapCache()
+        self.source_id = next(_source_ids)
+        self._rects = {}
+        
+        # Постоянный кэш на диске: повторно открытый документ не растеризуется
+        self.disk_cache = disk_cache
+        self._content_hash = None
+        self._hash_lock = threading.Lock()
+        
+        # fitz не потокобезопасен: доступ к документу из фонового потока сериализуем
+        self._doc_lock = threading.Lock()
+
+    def __len__(self):
+        return self.doc.page_count
+
+    @property
+    def page_count(self):
+        return self.doc.page_count
+
+    def quantize(self, scale):
+        """Округляет масштаб до шага ZOOM_STEP, чтобы повторные зумы попадали в кэш"""
+        return max(1, round(scale / self.ZOOM_STEP)) * self.ZOOM_STEP
+
+    def _matrix(self, scale):
+        zoom = self.dpi / 72.0 * scale
+        return fitz.Matrix(zoom, zoom)
+
+    def _cache_key(self, index, scale):
+        return (self.source_id, index, round(scale / self.ZOOM_STEP))
+
+    @property
+    def content_hash(self):
+        """Хэш содержимого для ключей дискового кэша.
+        
+        Первое обращение может читать весь файл - вызывается только из
+        фоновых потоков; главный поток берёт известное значение (known_content_hash).
+        """
+        with self._hash_lock:
+            if self._content_hash is None:
+                if self.disk_cache is not None:
+                    self._content_hash = self.disk_cache.document_hash(self.document)
+                else:
+                    self._content_hash = self.document.content_hash
+            return self._content_hash
+
+    def known_content_hash(self):
+        """Хэш содержимого, если он уже посчитан или запомнен в дисковом кэше, иначе None"""
+        if self._content_hash is None and self.disk_cache is not None:
+            # Запись в обход _hash_lock безопасна: значение то же, что посчитал бы фон
+            self._content_hash = self.disk_cache.known_document_hash(self.document)
+        return self._content_hash
+
+    def _disk_key(self, index, scale, content_hash):
+        return ('page', content_hash, index, round(self.dpi * scale, 2))
+
+    def _page_rect(self, index):
+        if index not in self._rects:
+            with self._doc_lock:
+                self._rects[index] = self.doc[index].rect
+        return self._rects[index]
+
+    def page_size(self, index, scale=1.0):
+        """Размер страницы в пикселях при базовом DPI и масштабе scale (без растеризации)"""
+        irect = (self._page_rect(index) * self._matrix(scale)).irect
+        return irect.width, irect.height
+
+    def is_rendered(self, index, scale):
+        return self._cache_key(index, scale) in self.cache
+
+    def rasterize(self, index, scale=1.0):
+        """Отрисовывает страницу fitz сразу в нужном масштабе, минуя кэш"""
+        with self._doc_lock:
+            pix = self.doc[index].get_pixmap(matrix=self._matrix(scale))
+            return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+    def render_thumbnail(self, index, box):
+        """Миниатюра страницы, вписанная в box (ширина, высота), минуя кэш"""
+        rect = self._page_rect(index)
+        zoom = min(box[0] / rect.width, box[1] / rect.height)
+        with self._doc_lock:
+            pix = self.doc[index].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+    def load(self, index, scale=1.0, wait_hash=True):
+        """Растр страницы с дискового кэша или свежеотрисованный, минуя кэш в памяти.
+        
+        wait_hash=False - не хэшировать файл: если хэш ещё не известен
+        (ни посчитан, ни запомнен дисковым кэшем), страница отрисовывается
+        без дискового кэша.
+        """
+        content_hash = None
+        if self.disk_cache is not None:
+            content_hash = self.content_hash if wait_hash else self.known_content_hash()
+        if content_hash is None:
+            return self.rasterize(index, scale)
+        
+        key = self._disk_key(index, scale, content_hash)
+        img = self.disk_cache.get(key)
+        if img is None:
+            img = self.rasterize(index, scale)
+            self.disk_cache.put(key, img)
+        return img
+
+    def store(self, index, scale, img):
+        self.cache.put(self._cache_key(index, scale), img)
+
+    def render(self, index, scale=1.0):
+        """Растр страницы в нужном масштабе (из кэша или свежеотрисованный)"""
+        key = self._cache_key(index, scale)
+        img = self.cache.get(key)
+        if img is None:
+            # Вызывается из главного потока - хэш файла здесь не считаем
+            img = self.load(index, scale, wait_hash=False)
+            self.cache.put(key, img)
+        return img
+
+    def render_preview(self, index, scale):
+        """Быстрое превью: ближайший по масштабу растр из кэша, растянутый BILINEAR"""
+        steps = round(scale / self.ZOOM_STEP)
+        # Тайлы (ключи длиннее) - фрагменты страницы, для превью не годятся
+        candidates = [key for key in self.cache.keys()
+                      if len(key) == 3 and key[0] == self.source_id and key[1] == index]
+        if not candidates:
+            return None
+        
+        best = min(candidates, key=lambda key: abs(key[2] - steps))
+        img = self.cache.get(best)
+        if img is None:
+            return None
+        return img.resize(self.page_size(index, scale), Image.Resampling.BILINEAR)
+
+    def tile_grid(self, index, scale):
+        """Число столбцов и строк тайлов страницы в масштабе scale"""
+        width, height = self.page_size(index, scale)
+        return -(-width // self.TILE_SIZE), -(-height // self.TILE_SIZE)
+
+    def rasterize_tile(self, index, scale, col, row):
+        """Отрисовывает только тайл (col, row) через clip fitz, минуя кэш"""
+        width, height = self.page_size(index, scale)
+        x0, y0 = col * self.TILE_SIZE, row * self.TILE_SIZE
+        pixels = fitz.Rect(x0, y0, min(x0 + self.TILE_SIZE, width), min(y0 + self.TILE_SIZE, height))
+        matrix = self._matrix(scale)
+        with self._doc_lock:
+            # clip задаётся в координатах видимой страницы, как и page.rect
+            pix = self.doc[index].get_pixmap(matrix=matrix, clip=pixels / matrix.a)
+            return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+    def is_tile_rendered(self, index, scale, col, row):
+        return self._cache_key(index, scale) + (col, row) in self.cache
+
+    def render_tile(self, index, scale, col, row):
+        """Тайл страницы из кэша или свежеотрисованный"""
+        key = self._cache_key(index, scale) + (col, row)
+        img = self.cache.get(key)
+        if img is None:
+            img = self.rasterize_tile(index, scale, col, row)
+            self.cache.put(key, img)
+        return img
+
+    def render_tile_preview(self, index, scale, col, row):
+        """Быстрое превью тайла без растеризации: фрагмент ближайшего по масштабу
+        растра из кэша (страницы целиком или её тайлов), растянутый BILINEAR.
+
+        Результат не кэшируется; None - для страницы в кэше ничего нет.
+        """
+        width, height = self.page_size(index, scale)
+        x0, y0 = col * self.TILE_SIZE, row * self.TILE_SIZE
+        box = (x0, y0, min(x0 + self.TILE_SIZE, width), min(y0 + self.TILE_SIZE, height))
+        steps = round(scale / self.ZOOM_STEP)
+        cached = {key[2] for key in self.cache.keys() if key[0] == self.source_id and key[1] == index}
+        for cached_steps in sorted(cached, key=lambda s: abs(s - steps)):
+            ratio = cached_steps / steps
+            region = self._cached_region(index, cached_steps, [c * ratio for c in box])
+            if region is not None:
+                return region.resize((box[2] - box[0], box[3] - box[1]), Image.Resampling.BILINEAR)
+        return None
+
+    def _cached_region(self, index, steps, box):
+        """Область box (в пикселях масштаба steps) из кэшированной страницы или её тайлов"""
+        left, top = int(box[0]), int(box[1])
+        right, bottom = max(left + 1, math.ceil(box[2])), max(top + 1, math.ceil(box[3]))
+        page_key = (self.source_id, index, steps)
+        img = self.cache.get(page_key) if page_key in self.cache else None
+        if img is not None:
+            return img.crop((left, top, min(right, img.width), min(bottom, img.height)))
+
+        region = None
+        tile = self.TILE_SIZE
+        for row in range(top // tile, (bottom - 1) // tile + 1):
+            for col in range(left // tile, (right - 1) // tile + 1):
+                key = page_key + (col, row)
+                img = self.cache.get(key) if key in self.cache else None
+                if img is None:
+                    continue
+                if region is None:
+                    # Недостающие тайлы остаются белыми, как подложка страницы
+                    region = Image.new("RGB", (right - left, bottom - top), "white")
+                region.paste(img, (col * tile - left, row * tile - top))
+        return region
+
+    def reload(self):
+        """Перечитывает документ после замены файла на диске (например, после
+        сохранения подписанного PDF поверх открытого)"""
+        self.cache.discard_if(lambda key: key[0] == self.source_id)
+        with self._doc_lock:
+            self.document.reopen()
+            self.doc = self.document.open_fitz()
+            self._rects = {}
+        with self._hash_lock:
+            self._content_hash = None
+        # Новый идентификатор: растры старого содержимого, ещё идущие из
+        # фоновых потоков, не попадут в кэш под ключами нового
+        self.source_id = next(_source_ids)
+
+    def close(self):
+        self.cache.discard_if(lambda key: key[0] == self.source_id)
+        with self._doc_lock:
+            self.doc.close()
+            if self.owns_document:
+                self.document.close()
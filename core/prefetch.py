@@ -0,0 +1,78 @@
+import functools
+import queue
+import threading
+
+
+class PrefetchWorker:
+    """Фоновый поток, заранее отрисовывающий соседние страницы.
+    
+    Готовые растры страниц передаются через deliver(callback) - в GUI это
+    root.after, поэтому canvas трогается только из главного потока. Тайлы
+    крупного зума кладутся прямо в потокобезопасный кэш PageSource.
+    """
+    THREAD_NAME = "page-prefetch"
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self._queue = queue.Queue()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=self.THREAD_NAME, daemon=True)
+        self._thread.start()
+
+    def schedule(self, source, pages, scale, on_ready):
+        """Ставит страницы в очередь, отменяя все ранее поставленные задания"""
+        self._enqueue([(source, index, scale, on_ready) for index in pages])
+
+    def schedule_tiles(self, source, tiles, scale):
+        """Ставит в очередь тайлы (страница, столбец, строка), отменяя прежние задания"""
+        self._enqueue([(source, index, scale, None, (col, row)) for index, col, row in tiles])
+
+    def _enqueue(self, jobs):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        for job in jobs:
+            self._queue.put((generation, job))
+
+    def cancel(self):
+        """Отменяет задания, которые ещё не начали выполняться"""
+        with self._lock:
+            self._generation += 1
+
+    def stop(self):
+        self.cancel()
+        self._queue.put(None)
+
+    def _is_stale(self, generation):
+        with self._lock:
+            return generation != self._generation
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            
+            generation, job = job
+            if self._is_stale(generation):
+                continue
+            
+            try:
+                callback = self._process(*job)
+            except Exception:
+                # Документ мог быть закрыт, пока задание ждало в очереди
+                continue
+            
+            if callback is not None and not self._is_stale(generation):
+                self.deliver(callback)
+
+    def _process(self, source, index, scale, on_ready, tile=None):
+        """Выполняет задание в фоновом потоке и возвращает callback для главного"""
+        if tile is not None:
+            source.render_tile(index, scale, *tile)
+            return None
+        if source.is_rendered(index, scale):
+            return None
+        img = source.load(index, scale)
+        return functools.partial(on_ready, source, index, scale, img)
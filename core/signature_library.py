@@ -0,0 +1,51 @@
+import hashlib
+import io
+from PIL import Image
+from .bitmap_cache import BitmapCache
+
+
+class SignatureLibrary:
+    """Библиотека подписей документа.
+
+    Каждый файл подписи читается и декодируется один раз; размещения ссылаются
+    на запись по её идентификатору (хэшу содержимого файла), поэтому подписи
+    разных людей в одном документе рисуются и сохраняются каждая своей
+    картинкой. Масштабированные для экрана копии лежат в LRU-кэше.
+    """
+    SCALED_CACHE_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, cache=None):
+        # идентификатор -> {'data', 'image'}
+        self._entries = {}
+        self.scaled_cache = cache if cache is not None else BitmapCache(max_bytes=self.SCALED_CACHE_BYTES)
+
+    def add(self, path):
+        """Добавляет подпись из файла и возвращает её идентификатор.
+
+        Тот же файл (или его копия) повторно не декодируется.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        sig_id = hashlib.blake2b(data, digest_size=8).hexdigest()
+        if sig_id not in self._entries:
+            image = Image.open(io.BytesIO(data)).convert("RGBA")
+            self._entries[sig_id] = {'data': data, 'image': image}
+        return sig_id
+
+    def data(self, sig_id):
+        """Исходные байты файла - их встраивает в PDF SigningEngine"""
+        return self._entries[sig_id]['data']
+
+    def image(self, sig_id):
+        """Декодированное изображение RGBA; изменять его на месте нельзя"""
+        return self._entries[sig_id]['image']
+
+    def scaled(self, sig_id, width, height):
+        """Копия подписи для экрана размером width x height (из кэша или LANCZOS)"""
+        size = (max(1, int(width)), max(1, int(height)))
+        key = (sig_id,) + size
+        img = self.scaled_cache.get(key)
+        if img is None:
+            img = self.image(sig_id).resize(size, Image.Resampling.LANCZOS)
+            self.scaled_cache.put(key, img)
+        return img
@@ -0,0 +1,53 @@
+import hashlib
+from .bitmap_cache import BitmapCache
+from .image_ops import SMOOTH_HALO, enhance_contrast, make_more_blue, mask_background, smooth_edges
+from .tiling import run_tiled
+
+
+class SignaturePipeline:
+    """Конвейер очистки подписи с отдельным кэшированием каждого этапа.
+    
+    Ключ этапа - хэш содержимого исходного изображения плюс параметры этого
+    и предыдущих этапов, поэтому изменение только синего оттенка не
+    пересчитывает удаление фона. Возвращаемые изображения лежат в кэше -
+    изменять их на месте нельзя.
+    """
+    CACHE_BYTES = 128 * 1024 * 1024
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else BitmapCache(max_bytes=self.CACHE_BYTES)
+
+    @staticmethod
+    def content_hash(image):
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+        digest.update(f"{image.mode}:{image.width}x{image.height}".encode())
+        return digest.hexdigest()
+
+    def _stage(self, key, compute):
+        result = self.cache.get(key)
+        if result is None:
+            result = compute()
+            self.cache.put(key, result)
+        return result
+
+    def run(self, image, threshold, saturation, smooth, blue_intensity, key=None):
+        if key is None:
+            key = self.content_hash(image)
+        
+        contrasted = self._stage(
+            ('contrast', key),
+            lambda: enhance_contrast(image))
+        result = self._stage(
+            ('mask', key, threshold, saturation),
+            lambda: run_tiled(mask_background, contrasted, threshold, saturation))
+        if smooth:
+            masked = result
+            result = self._stage(
+                ('smooth', key, threshold, saturation),
+                lambda: run_tiled(smooth_edges, masked, halo=SMOOTH_HALO))
+        if blue_intensity > 0:
+            base = result
+            result = self._stage(
+                ('blue', key, threshold, saturation, smooth, blue_intensity),
+                lambda: make_more_blue(base, blue_intensity))
+        return result
@@ -0,0 +1,108 @@
+import json
+import os
+from .engine import Placement
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11: шаблоны TOML только сохраняются, читается JSON
+    tomllib = None
+
+TEMPLATE_VERSION = 1
+
+# Поля размещения, общие с записями placed_signatures в GUI
+PLACEMENT_FIELDS = ('x_rel', 'y_rel', 'w_rel', 'h_rel')
+
+
+def resolve_pages(selector, page_count):
+    """Номера страниц (с нуля) по селектору шаблона.
+    
+    Селектор - номер страницы с нуля, как в placed_signatures, отрицательный
+    номер от конца документа (-1 - последняя), "first", "last" или "all".
+    """
+    if isinstance(selector, str):
+        name = selector.strip().lower()
+        if name == 'all':
+            return list(range(page_count))
+        if name == 'first':
+            selector = 0
+        elif name == 'last':
+            selector = -1
+        else:
+            try:
+                selector = int(name)
+            except ValueError:
+                raise ValueError(f"Неизвестный селектор страницы: {selector!r}")
+    
+    selector = int(selector)
+    index = selector + page_count if selector < 0 else selector
+    if not 0 <= index < page_count:
+        raise ValueError(f"Страница {selector!r} вне документа ({page_count} стр.)")
+    return [index]
+
+
+class PlacementTemplate:
+    """Набор размещений подписи в относительных координатах, применимый к любому PDF"""
+    def __init__(self, records, image=None):
+        self.records = [dict(record) for record in records]
+        self.image = image
+        for record in self.records:
+            missing = [field for field in ('page',) + PLACEMENT_FIELDS if field not in record]
+            if missing:
+                raise ValueError(f"В записи шаблона нет полей: {', '.join(missing)}")
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_placements(cls, placed_signatures):
+        """Шаблон из записей placed_signatures (страница и относительные координаты)"""
+        return cls([{field: sig[field] for field in ('page',) + PLACEMENT_FIELDS}
+                    for sig in placed_signatures])
+
+    @classmethod
+    def load(cls, path, image=None):
+        """Читает шаблон из JSON или TOML (по расширению файла)"""
+        if _is_toml(path):
+            if tomllib is None:
+                raise ValueError("Чтение TOML требует Python 3.11 или новее")
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        records = data['placements'] if isinstance(data, dict) else data
+        return cls(records, image=image)
+
+    def save(self, path):
+        """Сохраняет шаблон в JSON или TOML (по расширению файла)"""
+        records = [{field: record[field] for field in ('page',) + PLACEMENT_FIELDS}
+                   for record in self.records]
+        with open(path, "w", encoding="utf-8") as f:
+            if _is_toml(path):
+                f.write(_dump_toml(records))
+            else:
+                json.dump({'version': TEMPLATE_VERSION, 'placements': records}, f,
+                          ensure_ascii=False, indent=2)
+
+    def resolve(self, page_count):
+        """Конкретные размещения для документа с page_count страницами"""
+        placements = []
+        for record in self.records:
+            for index in resolve_pages(record['page'], page_count):
+                placements.append(Placement.from_dict(dict(record, page=index), self.image))
+        return placements
+
+
+def _is_toml(path):
+    return os.path.splitext(os.fspath(path))[1].lower() == ".toml"
+
+
+def _dump_toml(records):
+    lines = [f"version = {TEMPLATE_VERSION}"]
+    for record in records:
+        lines.append("")
+        lines.append("[[placements]]")
+        for field, value in record.items():
+            lines.append(f"{field} = {json.dumps(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,29 @@
+import functools
+from .disk_cache import DiskCache
+from .prefetch import PrefetchWorker
+
+
+class ThumbnailWorker(PrefetchWorker):
+    """Фоновая отрисовка миниатюр страниц при очень низком разрешении.
+    
+    Миниатюры сохраняются в DiskCache по хэшу содержимого документа, так что
+    повторное открытие того же файла (даже под другим именем) не требует
+    растеризации.
+    """
+    THREAD_NAME = "page-thumbnails"
+
+    def __init__(self, deliver, disk_cache=None):
+        super().__init__(deliver)
+        self.disk_cache = disk_cache if disk_cache is not None else DiskCache()
+
+    def schedule(self, source, pages, box, on_ready):
+        """Ставит миниатюры в очередь, отменяя все ранее поставленные задания"""
+        self._enqueue([(source, index, box, on_ready) for index in pages])
+
+    def _process(self, source, index, box, on_ready):
+        key = ('thumbnail', source.content_hash, index, box)
+        img = self.disk_cache.get(key)
+        if img is None:
+            img = source.render_thumbnail(index, box)
+            self.disk_cache.put(key, img)
+        return functools.partial(on_ready, source, index, img)
@@ -0,0 +1,66 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+# Изображения меньше этого размера обрабатываются в текущем потоке целиком
+TILED_MIN_PIXELS = 8 * 1000 * 1000
+# Минимальная высота полосы, чтобы накладные расходы не съели выигрыш
+MIN_TILE_ROWS = 128
+# Число процессов пула - по числу ядер
+WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Общий пул процессов, создаётся при первом обращении"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _run_tile(job):
+    func, tile, args = job
+    return func(tile, *args)
+
+
+def split_rows(height, tiles, halo):
+    """Границы полос (top, bottom) и их расширений на halo строк вверх и вниз"""
+    rows = max(MIN_TILE_ROWS, -(-height // tiles))
+    bounds = []
+    for top in range(0, height, rows):
+        bottom = min(top + rows, height)
+        bounds.append((top, bottom, max(0, top - halo), min(height, bottom + halo)))
+    return bounds
+
+
+def run_tiled(func, image, *args, halo=0):
+    """Применяет func к изображению горизонтальными полосами в пуле процессов.
+    
+    Каждая полоса берётся с запасом в halo строк сверху и снизу, чтобы
+    фильтры по соседям считались так же, как на целом изображении; запас
+    затем отрезается. Полосы занимают всю ширину, поэтому левый и правый
+    края совпадают с краями изображения. func должна быть функцией уровня
+    модуля и сохранять размер изображения.
+    """
+    if WORKERS < 2 or image.width * image.height < TILED_MIN_PIXELS:
+        return func(image, *args)
+    
+    pool = get_pool()
+    bounds = split_rows(image.height, 2 * WORKERS, halo)
+    jobs = [(func, image.crop((0, ext_top, image.width, ext_bottom)), args)
+            for _, _, ext_top, ext_bottom in bounds]
+    
+    result = None
+    for (top, bottom, ext_top, _), tile in zip(bounds, pool.map(_run_tile, jobs)):
+        if result is None:
+            result = Image.new(tile.mode, image.size)
+        inner = tile.crop((0, top - ext_top, tile.width, bottom - ext_top))
+        result.paste(inner, (0, top))
+    return result
@@ -0,0 +1,18 @@
+class DocumentTab:
+    """Состояние документа, открытого во вкладке главного окна.
+    
+    У каждой вкладки свой ленивый PageSource и свои размещения; кэш растров,
+    дисковый кэш и фоновые потоки отрисовки общие для всех вкладок.
+    """
+    def __init__(self, path, page_source, frame):
+        self.path = path
+        self.page_source = page_source
+        # Пустая рамка - заголовок вкладки в ttk.Notebook
+        self.frame = frame
+        self.current_page = 0
+        self.zoom_level = 100
+        self.placed_signatures = []
+
+    @property
+    def name(self):
+        return self.path.split('/')[-1].split('\\')[-1]
@@ -1,15 +1,30 @@
-import io
+import os
 import sys
-import fitz
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from PIL import Image, ImageTk, ImageDraw, ImageEnhance, ImageFilter
-from PyPDF2 import PdfReader, PdfWriter
-from reportlab.pdfgen import canvas
+from core import (BitmapCache, DiskCache, PageSource, Placement, PlacementTemplate, PrefetchWorker,
+                  SignatureLibrary, SigningEngine)
+from .document_tab import DocumentTab
 from .signature_crop_window import SignatureCropWindow
+from .thumbnail_strip import ThumbnailStrip
 
 
 class PDFSignerApp:
+    # Бюджет памяти под растры страниц
+    PAGE_CACHE_BYTES = 256 * 1024 * 1024
+    # Сколько страниц вперёд и назад отрисовывать заранее
+    PREFETCH_PAGES = 2
+    # Пауза после последнего движения ползунка, после которой идёт точный рендер
+    RENDER_SETTLE_MS = 150
+    # Длительность кадра: перетаскивание обновляет canvas не чаще раза за кадр
+    DRAG_FRAME_MS = 16
+    # Бюджет памяти под готовые PhotoImage размещённых подписей
+    SIGNATURE_PHOTO_BYTES = 32 * 1024 * 1024
+    # Файлы крупнее этого размера всегда сохраняются потоково (инкрементально)
+    STREAMING_SAVE_BYTES = 512 * 1024 * 1024
+
     def __init__(self, root):
         self.root = root
         self.root.title("PDF Signature Professional")
@@ -21,14 +36,30 @@ class PDFSignerApp:
         except:
             pass
         
+        # Открытые документы: имя рамки вкладки -> DocumentTab. Поля ниже
+        # (pdf_path, page_source, placed_signatures...) - состояние активной вкладки
+        self.tabs = {}
+        self.active_tab = None
+        
         # Данные
         self.pdf_path = None
-        self.signature_path = None
-        self.pdf_images = []
+        self.page_source = None
+        self.page_cache = BitmapCache(max_bytes=self.PAGE_CACHE_BYTES)
+        # Растры страниц и миниатюр между запусками (по хэшу содержимого файла)
+        self.disk_cache = DiskCache()
+        self.prefetcher = PrefetchWorker(lambda callback: self.root.after(0, callback))
         self.current_page = 0
         self.signature_img = None
         self.signature_photo = None
         
+        # Все загруженные подписи; размещения ссылаются на них по идентификатору
+        self.signatures = SignatureLibrary()
+        self.signature_id = None
+        # PhotoImage по (подпись, ширина, высота): повторный зум и возврат на
+        # страницу не пересэмплируют подписи; Tk хранит 4 байта на пиксель
+        self.signature_photos = BitmapCache(max_bytes=self.SIGNATURE_PHOTO_BYTES,
+                                            size_of=lambda photo: photo.width() * photo.height() * 4)
+        
         # Позиция и размер подписи (в пикселях экрана для редактируемой подписи)
         self.sig_x = 100
         self.sig_y = 100
@@ -47,6 +78,13 @@ class PDFSignerApp:
         self.dragging = False
         self.drag_start_x = 0
         self.drag_start_y = 0
+        # Последняя ещё не отрисованная позиция, время первого события в ней и таймер кадра
+        self.drag_target = None
+        self.drag_event_time = None
+        self.drag_timer = None
+        self.drag_last_update = 0.0
+        # Замер отзывчивости: события, обновления canvas и задержка от события до move
+        self.drag_stats = {'events': 0, 'updates': 0, 'max_latency_ms': 0.0, 'avg_latency_ms': 0.0}
         
         # Параметры скролла
         self.allow_auto_page_switch = False
@@ -54,6 +92,18 @@ class PDFSignerApp:
         self.effort_threshold = 3
         self.last_scroll_pos = 0.0
         
+        # Планировщик перерисовки для ползунков: превью раз за цикл, точный рендер после паузы
+        self.preview_render_pending = False
+        self.render_settle_timer = None
+        self.placed_preview = False
+        
+        # Страница крупнее окна рисуется тайлами: (столбец, строка) -> (item, PhotoImage)
+        self.tiled = False
+        self.page_tiles = {}
+        self.tile_update_pending = False
+        # По ходу жеста тайлы собираются из кэша, растеризация - после паузы
+        self.tiles_preview = False
+        
         self.setup_styles()
         self.create_menu()
         self.create_main_area()
@@ -76,6 +126,12 @@ class PDFSignerApp:
         file_menu = tk.Menu(self.menubar, tearoff=0)
         file_menu.add_command(label="Открыть PDF...", command=self.load_pdf, accelerator="Ctrl+O")
         file_menu.add_command(label="Сохранить как...", command=self.save_signed_pdf, accelerator="Ctrl+S")
+        self.incremental_save_var = tk.BooleanVar(value=False)
+        file_menu.add_checkbutton(label="Дописывать подписи в конец файла (инкрементально)",
+                                  variable=self.incremental_save_var)
+        file_menu.add_separator()
+        file_menu.add_command(label="Сохранить шаблон размещения...", command=self.save_template)
+        file_menu.add_command(label="Применить шаблон размещения...", command=self.apply_template)
         file_menu.add_separator()
         file_menu.add_command(label="Закрыть файл", command=self.close_pdf, accelerator="Ctrl+W")
         file_menu.add_separator()
@@ -103,6 +159,13 @@ class PDFSignerApp:
         self.root.bind("<Control-Return>", lambda e: self.place_signature())
 
     def create_main_area(self):
+        # Вкладки открытых документов (только заголовки - содержимое общее)
+        self.tab_bar = ttk.Notebook(self.root)
+        self.tab_bar.pack(side=tk.TOP, fill=tk.X)
+        self.tab_bar.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        # Ctrl+Tab / Ctrl+Shift+Tab - переключение между документами
+        self.tab_bar.enable_traversal()
+        
         self.main_container = ttk.Frame(self.root)
         self.main_container.pack(fill=tk.BOTH, expand=True)
 
@@ -136,11 +199,16 @@ class PDFSignerApp:
         ttk.Label(self.signature_tools_frame, text=instruction_text, 
                  font=("Segoe UI", 8), foreground="#666", justify=tk.LEFT).pack(anchor=tk.W, pady=5)
 
+        # Левая панель миниатюр страниц
+        self.thumbnails = ThumbnailStrip(self.main_container, on_select=self.go_to_page,
+                                         disk_cache=self.disk_cache)
+        self.thumbnails.pack(side=tk.LEFT, fill=tk.Y)
+
         # Canvas с прокруткой
         self.canvas = tk.Canvas(self.main_container, bg="#525659", highlightthickness=0, cursor="cross")
         self.v_scroll = ttk.Scrollbar(self.main_container, orient=tk.VERTICAL, command=self.canvas.yview)
         self.h_scroll = ttk.Scrollbar(self.main_container, orient=tk.HORIZONTAL, command=self.canvas.xview)
-        self.canvas.configure(yscrollcommand=self.on_canvas_scroll_y, xscrollcommand=self.h_scroll.set)
+        self.canvas.configure(yscrollcommand=self.on_canvas_scroll_y, xscrollcommand=self.on_canvas_scroll_x)
 
         self.v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
@@ -153,6 +221,7 @@ class PDFSignerApp:
         self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
         self.canvas.bind("<Button-4>", self.on_mouse_wheel)
         self.canvas.bind("<Button-5>", self.on_mouse_wheel)
+        self.canvas.bind("<Configure>", lambda e: self._schedule_tile_update())
 
     def create_bottom_bar(self):
         self.bottom_bar = ttk.Frame(self.root, style="Bottom.TFrame", padding=(10, 5))
@@ -192,8 +261,8 @@ class PDFSignerApp:
         """Показывает или скрывает инструменты в зависимости от состояния"""
         if self.pdf_path:
             self.zoom_frame.pack(side=tk.RIGHT, padx=15)
-            self.total_pages_label.config(text=f"/ {len(self.pdf_images)}")
-            self.page_spin.config(to=len(self.pdf_images))
+            self.total_pages_label.config(text=f"/ {len(self.page_source)}")
+            self.page_spin.config(to=len(self.page_source))
         else:
             self.zoom_frame.pack_forget()
             
@@ -216,33 +285,75 @@ class PDFSignerApp:
         )
         if not path: return
         
-        if self.pdf_path:
-            response = messagebox.askyesno("Подтверждение", 
-                                          "Закрыть текущий PDF и открыть новый?")
-            if not response:
+        # Уже открытый документ просто делаем активным
+        for tab in self.tabs.values():
+            if os.path.abspath(tab.path) == os.path.abspath(path):
+                self.tab_bar.select(tab.frame)
                 return
-            self.close_pdf()
         
-        self.pdf_path = path
         try:
-            doc = fitz.open(path)
-            self.pdf_images = []
-            for page in doc:
-                pix = page.get_pixmap(dpi=150)
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                self.pdf_images.append(img)
-            self.current_page = 0
-            self.page_var.set(1)
-            self.allow_auto_page_switch = False
-            self.placed_signatures = []
-            self.active_signature = False
-            self.toggle_tools()
-            self.display_page()
-            self.root.after(500, lambda: setattr(self, 'allow_auto_page_switch', True))
-            filename = path.split('/')[-1].split('\\')[-1]
-            self.status_label.config(text=f"Открыт: {filename} ({len(self.pdf_images)} стр.)")
+            # Страницы растеризуются лениво при отображении
+            page_source = PageSource(path, dpi=150, cache=self.page_cache,
+                                     disk_cache=self.disk_cache)
         except Exception as e:
             messagebox.showerror("Ошибка", f"Не удалось загрузить PDF:\n{e}")
+            return
+        
+        tab = DocumentTab(path, page_source, ttk.Frame(self.tab_bar, height=0))
+        self.tabs[str(tab.frame)] = tab
+        self.tab_bar.add(tab.frame, text=tab.name)
+        self.tab_bar.select(tab.frame)
+        
+        self.allow_auto_page_switch = False
+        self.active_signature = False
+        self.activate_tab(tab)
+        self.root.after(500, lambda: setattr(self, 'allow_auto_page_switch', True))
+        self.status_label.config(text=f"Открыт: {tab.name} ({len(self.page_source)} стр.)")
+
+    def on_tab_changed(self, event):
+        # Событие приходит из очереди Tk и после программного select/forget -
+        # к этому моменту нужная вкладка уже активна
+        tab = self.tabs.get(self.tab_bar.select())
+        if tab is not None and tab is not self.active_tab:
+            self.activate_tab(tab)
+            self.status_label.config(text=f"{tab.name} ({len(self.page_source)} стр.)")
+
+    def _store_active_tab(self):
+        tab = self.active_tab
+        if tab is not None:
+            tab.current_page = self.current_page
+            tab.zoom_level = self.zoom_level
+            tab.placed_signatures = self.placed_signatures
+
+    def activate_tab(self, tab):
+        """Делает документ вкладки текущим: подменяет состояние просмотрщика"""
+        self._store_active_tab()
+        self.prefetcher.cancel()
+        
+        self.active_tab = tab
+        self.pdf_path = tab.path
+        self.page_source = tab.page_source
+        self.current_page = tab.current_page
+        self.placed_signatures = tab.placed_signatures
+        self.zoom_level = tab.zoom_level
+        
+        # Общий бюджет памяти: растры фоновых вкладок вытесняются первыми
+        source_id = tab.page_source.source_id
+        self.page_cache.demote_if(lambda key: key[0] != source_id)
+        
+        self.zoom_var.set(self.zoom_level)
+        self.zoom_percent_label.config(text=f"{self.zoom_level}%")
+        self.page_var.set(self.current_page + 1)
+        self.thumbnails.set_source(self.page_source)
+        
+        # Принудительная перерисовка: другая страница другого документа
+        if hasattr(self, 'sig_x_rel'): del self.sig_x_rel
+        if hasattr(self, 'sig_y_rel'): del self.sig_y_rel
+        if hasattr(self, '_last_sig_size'): del self._last_sig_size
+        if hasattr(self, '_last_state'): del self._last_state
+        
+        self.toggle_tools()
+        self.display_page()
 
     def close_pdf(self):
         if not self.pdf_path:
@@ -255,17 +366,39 @@ class PDFSignerApp:
             if not response:
                 return
         
-        self.pdf_path = None
-        self.pdf_images = []
-        self.current_page = 0
-        self.placed_signatures = []
+        tab = self.active_tab
+        self.active_tab = None
+        self.prefetcher.cancel()
+        self.thumbnails.set_source(None)
+        self.tab_bar.forget(tab.frame)
+        del self.tabs[str(tab.frame)]
+        tab.frame.destroy()
+        tab.page_source.close()
+        
+        self.canvas.delete("all")
+        self.tiled = False
+        self.tiles_preview = False
+        self.page_tiles = {}
+        
+        # Остались другие вкладки - переходим на ту, что выбрал Notebook;
+        # загруженная подпись общая для всех вкладок и остаётся
+        remaining = self.tabs.get(self.tab_bar.select()) if self.tabs else None
+        if remaining is not None:
+            self.activate_tab(remaining)
+            self.status_label.config(text=f"Файл закрыт. Открыт: {remaining.name}")
+            return
+        
         self.signature_img = None
+        self.signature_id = None
         self.signature_photo = None
         self.active_signature = False
+        self.pdf_path = None
+        self.page_source = None
+        self.current_page = 0
+        self.placed_signatures = []
         self.page_var.set(1)
         self.total_pages_label.config(text="/ 0")
         self.toggle_tools()
-        self.canvas.delete("all")
         self.status_label.config(text="Файл закрыт")
 
     def create_signature(self):
@@ -287,8 +420,12 @@ class PDFSignerApp:
         )
         if not path: return
         
-        self.signature_path = path
-        self.signature_img = Image.open(path)
+        try:
+            self.signature_id = self.signatures.add(path)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить подпись:\n{e}")
+            return
+        self.signature_img = self.signatures.image(self.signature_id)
         aspect = self.signature_img.width / self.signature_img.height
         self.sig_width = int(self.size_scale.get())
         self.sig_height = int(self.sig_width / aspect)
@@ -325,11 +462,10 @@ class PDFSignerApp:
             return
         
         # Рассчитываем относительные координаты
-        page_img = self.pdf_images[self.current_page]
-        page_width = int(page_img.width * self.scale_factor)
-        page_height = int(page_img.height * self.scale_factor)
+        page_width, page_height = self.page_source.page_size(self.current_page, self.scale_factor)
         
         self.placed_signatures.append({
+            'signature': self.signature_id,
             'page': self.current_page,
             'x_rel': self.sig_x_rel if hasattr(self, 'sig_x_rel') else (self.sig_x - self.offset_x) / page_width,
             'y_rel': self.sig_y_rel if hasattr(self, 'sig_y_rel') else (self.sig_y - self.offset_y) / page_height,
@@ -354,10 +490,71 @@ class PDFSignerApp:
         count = len(self.placed_signatures)
         self.status_label.config(text=f"Подпись установлена! Всего подписей: {count}")
 
+    def save_template(self):
+        if len(self.placed_signatures) == 0:
+            messagebox.showwarning("Предупреждение", "Установите хотя бы одну подпись")
+            return
+        
+        path = filedialog.asksaveasfilename(
+            title="Сохранить шаблон размещения",
+            defaultextension=".json",
+            filetypes=[("Шаблон JSON", "*.json"), ("Шаблон TOML", "*.toml")]
+        )
+        if not path: return
+        
+        try:
+            PlacementTemplate.from_placements(self.placed_signatures).save(path)
+            self.status_label.config(text=f"Шаблон сохранён: {path.split('/')[-1].split(chr(92))[-1]}")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить шаблон:\n{e}")
+
+    def apply_template(self):
+        if not self.pdf_path:
+            messagebox.showwarning("Предупреждение", "Сначала загрузите PDF")
+            return
+        
+        if not self.signature_img:
+            messagebox.showwarning("Предупреждение", "Сначала загрузите подпись")
+            return
+        
+        path = filedialog.askopenfilename(
+            title="Применить шаблон размещения",
+            filetypes=[("Шаблоны", "*.json;*.toml"), ("Все файлы", "*.*")]
+        )
+        if not path: return
+        
+        try:
+            placements = PlacementTemplate.load(path).resolve(len(self.page_source))
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось применить шаблон:\n{e}")
+            return
+        
+        for placement in placements:
+            self.placed_signatures.append({
+                'signature': self.signature_id,
+                'page': placement.page,
+                'x_rel': placement.x_rel,
+                'y_rel': placement.y_rel,
+                'w_rel': placement.w_rel,
+                'h_rel': placement.h_rel
+            })
+        
+        # Перерисовываем страницу с новыми подписями
+        if hasattr(self, '_last_state'): del self._last_state
+        self.display_page()
+        
+        count = len(self.placed_signatures)
+        self.status_label.config(text=f"Шаблон применён: +{len(placements)}. Всего подписей: {count}")
+
+    def on_canvas_scroll_x(self, *args):
+        self.h_scroll.set(*args)
+        self._schedule_tile_update()
+
     def on_canvas_scroll_y(self, *args):
         self.v_scroll.set(*args)
+        self._schedule_tile_update()
         
-        if not self.pdf_images or len(self.pdf_images) <= 1:
+        if not self.page_source or len(self.page_source) <= 1:
             return
         
         scroll_pos = float(args[0])
@@ -375,16 +572,42 @@ class PDFSignerApp:
         self.zoom_level = int(float(value))
         self.zoom_percent_label.config(text=f"{self.zoom_level}%")
         self.allow_auto_page_switch = False
-        self.display_page()
+        
+        self.request_render()
         self.root.after(200, lambda: setattr(self, 'allow_auto_page_switch', True))
 
+    def request_render(self):
+        """Перерисовка по ходу жеста (зум, размер подписи).
+        
+        Запросы сливаются: пока ползунок двигается, раз за цикл событий
+        рисуется дешёвое превью последнего состояния, а точный рендер с
+        LANCZOS - один раз, когда жест затих на RENDER_SETTLE_MS.
+        """
+        if not self.preview_render_pending:
+            self.preview_render_pending = True
+            self.root.after_idle(self._run_preview_render)
+        if self.render_settle_timer:
+            self.root.after_cancel(self.render_settle_timer)
+        self.render_settle_timer = self.root.after(self.RENDER_SETTLE_MS, self._run_final_render)
+
+    def _run_preview_render(self):
+        self.preview_render_pending = False
+        if self.render_settle_timer:
+            self.display_page(preview=True)
+
+    def _run_final_render(self):
+        self.render_settle_timer = None
+        self.display_page()
+
     def change_page(self):
-        if not self.pdf_images: return
+        if not self.page_source: return
         try:
             page_num = self.page_var.get()
-            if 1 <= page_num <= len(self.pdf_images):
+            if 1 <= page_num <= len(self.page_source):
                 self.current_page = page_num - 1
                 self.allow_auto_page_switch = False
+                # Прыжок на другую страницу: задания для старых соседей больше не нужны
+                self.prefetcher.cancel()
                 
                 if self.active_signature:
                     canvas_width = self.canvas.winfo_width()
@@ -400,47 +623,95 @@ class PDFSignerApp:
                 self.canvas.yview_moveto(0)
                 self.root.after(200, lambda: setattr(self, 'allow_auto_page_switch', True))
             else:
-                messagebox.showwarning("Ошибка", f"Введите номер страницы от 1 до {len(self.pdf_images)}")
+                messagebox.showwarning("Ошибка", f"Введите номер страницы от 1 до {len(self.page_source)}")
                 self.page_var.set(self.current_page + 1)
         except:
             self.page_var.set(self.current_page + 1)
 
+    def go_to_page(self, index):
+        self.page_var.set(index + 1)
+        self.change_page()
+
     def resize_signature(self, value):
         if not self.signature_img: return
         aspect = self.signature_img.width / self.signature_img.height
         self.sig_width = int(float(value))
         self.sig_height = int(self.sig_width / aspect)
-        self.display_page()
+        self.request_render()
 
-    def display_page(self):
-        if not self.pdf_images: return
+    def display_page(self, preview=False):
+        if not self.page_source: return
         
-        page_img = self.pdf_images[self.current_page]
+        self.thumbnails.set_current(self.current_page)
+        self.thumbnails.set_marked(sig['page'] for sig in self.placed_signatures)
+        
+        page_w, page_h = self.page_source.page_size(self.current_page)
         zoom_factor = self.zoom_level / 100.0
         
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
         if canvas_width <= 1: canvas_width, canvas_height = 800, 600
         
-        scale_x = canvas_width / page_img.width
-        scale_y = canvas_height / page_img.height
+        scale_x = canvas_width / page_w
+        scale_y = canvas_height / page_h
         base_scale = min(scale_x, scale_y, 1.0)
-        self.scale_factor = base_scale * zoom_factor
+        self.scale_factor = self.page_source.quantize(base_scale * zoom_factor)
         
-        new_width = int(page_img.width * self.scale_factor)
-        new_height = int(page_img.height * self.scale_factor)
+        new_width, new_height = self.page_source.page_size(self.current_page, self.scale_factor)
         
         self.offset_x = max((canvas_width - new_width) // 2, 0)
         self.offset_y = max((canvas_height - new_height) // 2, 0)
 
+        # Страница не помещается в окно - рисуем только видимые тайлы
+        self.tiled = new_width > canvas_width or new_height > canvas_height
+
         # 1. Обновляем фоновую страницу (только если изменился масштаб или страница)
-        if not hasattr(self, '_last_state') or self._last_state != (self.current_page, self.scale_factor):
+        state = (self.current_page, self.scale_factor)
+        page_img = None
+        if self.tiled:
+            state = state + ("tiles",)
+            last_state = getattr(self, '_last_state', None)
+            if preview and last_state is not None and last_state[:3] == state:
+                # Масштаб не менялся (например, жест меняет размер подписи) -
+                # нарисованные тайлы остаются на месте
+                state = last_state
+            elif preview and not self._visible_tiles_rendered():
+                # Тайлы превью растягиваются из кэша и заменяются точными после паузы
+                state = state + ("preview",)
+        elif preview and not self.page_source.is_rendered(*state):
+            # Превью не кэшируется и помечается отдельно, чтобы точный рендер его заменил
+            page_img = self.page_source.render_preview(*state)
+            if page_img is not None:
+                state = state + ("preview",)
+        self.tiles_preview = self.tiled and state[-1] == "preview"
+        
+        if not hasattr(self, '_last_state') or self._last_state != state:
             self.canvas.delete("all") # Полная очистка только при смене страницы/зума
-            page_resized = page_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            self.page_photo = ImageTk.PhotoImage(page_resized)
-            self.canvas.create_image(self.offset_x, self.offset_y, anchor=tk.NW, image=self.page_photo, tags="page")
-            self._last_state = (self.current_page, self.scale_factor)
+            self.page_tiles = {}
+            self.page_photo = None
+            if self.tiled:
+                # Подложка размером со страницу: тайлы ложатся поверх неё по мере прокрутки
+                self.canvas.create_rectangle(self.offset_x, self.offset_y,
+                                             self.offset_x + new_width, self.offset_y + new_height,
+                                             fill="white", outline="", tags=("page", "page_bg"))
+            else:
+                if page_img is None:
+                    page_img = self.page_source.render(*state)
+                self.page_photo = ImageTk.PhotoImage(page_img)
+                self.canvas.create_image(self.offset_x, self.offset_y, anchor=tk.NW, image=self.page_photo, tags="page")
+            self._last_state = state
+            if hasattr(self, '_last_sig_size'): del self._last_sig_size
+            self._draw_placed_signatures(new_width, new_height, preview)
+            if not preview:
+                if self.tiled:
+                    self._schedule_tile_prefetch()
+                else:
+                    self._schedule_prefetch()
+        elif not preview and self.placed_preview:
+            # Страница та же, но подписи остались от превью жеста - доводим их до LANCZOS
+            self.canvas.delete("placed_sig")
             self._draw_placed_signatures(new_width, new_height)
+            self.canvas.tag_raise("signature")
         
         # 2. Обновляем активную подпись (без удаления всего остального)
         if self.active_signature and self.signature_img:
@@ -451,15 +722,21 @@ class PDFSignerApp:
             self.sig_x = self.offset_x + (self.sig_x_rel * new_width)
             self.sig_y = self.offset_y + (self.sig_y_rel * new_height)
             
-            # Если картинка подписи изменилась (размер), пересоздаем её
-            if not hasattr(self, '_last_sig_size') or self._last_sig_size != (self.sig_width, self.sig_height):
-                sig_resized = self.signature_img.resize((self.sig_width, self.sig_height), Image.Resampling.LANCZOS)
+            # Если картинка подписи изменилась (размер или качество), пересоздаем её
+            sig_size = (self.sig_width, self.sig_height, preview)
+            if not hasattr(self, '_last_sig_size') or self._last_sig_size != sig_size:
+                if preview:
+                    # По ходу жеста - быстрый BILINEAR мимо кэша, LANCZOS - после паузы
+                    sig_resized = self.signature_img.resize((self.sig_width, self.sig_height),
+                                                            Image.Resampling.BILINEAR)
+                else:
+                    sig_resized = self.signatures.scaled(self.signature_id, self.sig_width, self.sig_height)
                 self.signature_photo = ImageTk.PhotoImage(sig_resized)
                 self.canvas.delete("signature")
                 self.canvas.create_image(self.sig_x, self.sig_y, anchor=tk.NW, image=self.signature_photo, tags="signature")
                 self.canvas.create_rectangle(self.sig_x, self.sig_y, self.sig_x + self.sig_width, self.sig_y + self.sig_height, 
                                             outline="#e74c3c", width=2, tags=("signature", "sig_rect"))
-                self._last_sig_size = (self.sig_width, self.sig_height)
+                self._last_sig_size = sig_size
             else:
                 # Если размер тот же, просто двигаем существующие объекты по тегу
                 items = self.canvas.find_withtag("signature")
@@ -473,10 +750,101 @@ class PDFSignerApp:
             self.canvas.delete("signature")
 
         self.canvas.configure(scrollregion=(0, 0, max(canvas_width, new_width), max(canvas_height, new_height)))
+        if self.tiled:
+            self._update_tiles()
+
+    def _schedule_tile_update(self):
+        # Прокрутка присылает серию событий - тайлы пересчитываются раз за цикл
+        if self.tiled and not self.tile_update_pending:
+            self.tile_update_pending = True
+            self.root.after_idle(self._update_tiles)
+
+    def _visible_tiles(self):
+        """Тайлы (столбец, строка) текущей страницы, попадающие в окно"""
+        tile = self.page_source.TILE_SIZE
+        cols, rows = self.page_source.tile_grid(self.current_page, self.scale_factor)
+        left = self.canvas.canvasx(0) - self.offset_x
+        top = self.canvas.canvasy(0) - self.offset_y
+        right = left + self.canvas.winfo_width()
+        bottom = top + self.canvas.winfo_height()
+        return {(col, row)
+                for col in range(max(0, int(left // tile)), min(cols, int(right // tile) + 1))
+                for row in range(max(0, int(top // tile)), min(rows, int(bottom // tile) + 1))}
+
+    def _visible_tiles_rendered(self):
+        return all(self.page_source.is_tile_rendered(self.current_page, self.scale_factor, col, row)
+                   for col, row in self._visible_tiles())
 
-    def _draw_placed_signatures(self, new_width, new_height):
+    def _update_tiles(self):
+        """Дорисовывает тайлы, попавшие в видимую область, и удаляет ушедшие за край"""
+        self.tile_update_pending = False
+        if not self.page_source or not self.tiled:
+            return
+        
+        tile = self.page_source.TILE_SIZE
+        visible = self._visible_tiles()
+        
+        # Ушедшие из окна тайлы освобождают память Tk; растры остаются в LRU-кэше
+        for key in [key for key in self.page_tiles if key not in visible]:
+            item, _ = self.page_tiles.pop(key)
+            self.canvas.delete(item)
+        
+        for col, row in sorted(visible - self.page_tiles.keys()):
+            if self.tiles_preview:
+                # Промежуточный зум не растеризуется и не вытесняет из кэша готовые растры
+                img = self.page_source.render_tile_preview(self.current_page, self.scale_factor, col, row)
+                if img is None:
+                    continue
+            else:
+                img = self.page_source.render_tile(self.current_page, self.scale_factor, col, row)
+            photo = ImageTk.PhotoImage(img)
+            item = self.canvas.create_image(self.offset_x + col * tile, self.offset_y + row * tile,
+                                            anchor=tk.NW, image=photo, tags=("page", "tile"))
+            # Сразу над подложкой, под подписями
+            self.canvas.tag_raise(item, "page_bg")
+            self.page_tiles[(col, row)] = (item, photo)
+
+    def _schedule_prefetch(self):
+        """Ставит соседние страницы в фоновую отрисовку при текущем зуме"""
+        pages = []
+        for step in range(1, self.PREFETCH_PAGES + 1):
+            for index in (self.current_page + step, self.current_page - step):
+                if 0 <= index < len(self.page_source):
+                    pages.append(index)
+        self.prefetcher.schedule(self.page_source, pages, self.scale_factor, self._on_page_prefetched)
+
+    def _schedule_tile_prefetch(self):
+        """Ставит в фоновую отрисовку тайлы первого экрана соседних страниц.
+        
+        Следующие страницы открываются сверху, предыдущие - снизу; по
+        горизонтали берутся столбцы, видимые сейчас.
+        """
+        tile = self.page_source.TILE_SIZE
+        left = max(0.0, self.canvas.canvasx(0) - self.offset_x)
+        right = left + self.canvas.winfo_width()
+        view_height = self.canvas.winfo_height()
+        tiles = []
+        for step in range(1, self.PREFETCH_PAGES + 1):
+            for index in (self.current_page + step, self.current_page - step):
+                if not 0 <= index < len(self.page_source):
+                    continue
+                cols, rows = self.page_source.tile_grid(index, self.scale_factor)
+                _, page_height = self.page_source.page_size(index, self.scale_factor)
+                top = 0 if index > self.current_page else max(0, page_height - view_height)
+                tiles.extend((index, col, row)
+                             for row in range(int(top // tile), min(rows, int((top + view_height) // tile) + 1))
+                             for col in range(int(left // tile), min(cols, int(right // tile) + 1)))
+        self.prefetcher.schedule_tiles(self.page_source, tiles, self.scale_factor)
+
+    def _on_page_prefetched(self, source, index, scale, img):
+        # Вызывается в главном потоке через root.after
+        if source is self.page_source:
+            source.store(index, scale, img)
+
+    def _draw_placed_signatures(self, new_width, new_height, preview=False):
         """Вспомогательный метод для отрисовки уже поставленных подписей"""
         self.placed_photos = []
+        self.placed_preview = preview
         for sig in self.placed_signatures:
             if sig['page'] == self.current_page:
                 px = self.offset_x + (sig['x_rel'] * new_width)
@@ -484,8 +852,17 @@ class PDFSignerApp:
                 pw = sig['w_rel'] * new_width
                 ph = sig['h_rel'] * new_height
                 
-                sig_resized = self.signature_img.resize((int(pw), int(ph)), Image.Resampling.LANCZOS)
-                sig_photo = ImageTk.PhotoImage(sig_resized)
+                # Каждое размещение рисуется своей подписью из библиотеки
+                key = (sig['signature'], max(1, int(pw)), max(1, int(ph)))
+                sig_photo = self.signature_photos.get(key)
+                if sig_photo is None and preview:
+                    # Промежуточный масштаб жеста не кэшируем и не тратим на него LANCZOS
+                    sig_photo = ImageTk.PhotoImage(
+                        self.signatures.image(key[0]).resize(key[1:], Image.Resampling.BILINEAR))
+                elif sig_photo is None:
+                    sig_photo = ImageTk.PhotoImage(self.signatures.scaled(*key))
+                    self.signature_photos.put(key, sig_photo)
+                # Ссылка на время показа: вытеснение из кэша не стирает подпись с canvas
                 self.placed_photos.append(sig_photo)
                 
                 self.canvas.create_image(px, py, anchor=tk.NW, image=sig_photo, tags="placed_sig")
@@ -501,26 +878,58 @@ class PDFSignerApp:
             self.dragging = True
             canvas_x, canvas_y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
             self.drag_start_x, self.drag_start_y = canvas_x - self.sig_x, canvas_y - self.sig_y
+            self.drag_stats = {'events': 0, 'updates': 0, 'max_latency_ms': 0.0, 'avg_latency_ms': 0.0}
 
     def on_mouse_drag(self, event):
-        if self.dragging:
-            canvas_x, canvas_y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
-            new_x = canvas_x - self.drag_start_x
-            new_y = canvas_y - self.drag_start_y
-            
-            page_img = self.pdf_images[self.current_page]
-            new_width = int(page_img.width * self.scale_factor)
-            new_height = int(page_img.height * self.scale_factor)
-            
-            # Обновляем только относительные координаты
-            self.sig_x_rel = (new_x - self.offset_x) / new_width
-            self.sig_y_rel = (new_y - self.offset_y) / new_height
-            
-            # Вызываем display_page, который теперь умеет двигать объекты без мерцания
-            self.display_page()
+        if not self.dragging:
+            return
+        
+        # Только запоминаем позицию: серия событий сливается в одно обновление за кадр
+        canvas_x, canvas_y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        self.drag_target = (canvas_x - self.drag_start_x, canvas_y - self.drag_start_y)
+        if self.drag_event_time is None:
+            self.drag_event_time = time.perf_counter()
+        self.drag_stats['events'] += 1
+        
+        if self.drag_timer is None:
+            elapsed_ms = (time.perf_counter() - self.drag_last_update) * 1000
+            delay = max(0, int(self.DRAG_FRAME_MS - elapsed_ms))
+            self.drag_timer = self.root.after(delay, self._apply_drag)
+
+    def _apply_drag(self):
+        """Сдвигает подпись на canvas к последней позиции курсора без перерисовки страницы"""
+        self.drag_timer = None
+        if self.drag_target is None:
+            return
+        
+        new_x, new_y = self.drag_target
+        self.canvas.move("signature", new_x - self.sig_x, new_y - self.sig_y)
+        self.sig_x, self.sig_y = new_x, new_y
+        
+        now = time.perf_counter()
+        latency_ms = (now - self.drag_event_time) * 1000
+        stats = self.drag_stats
+        stats['updates'] += 1
+        stats['max_latency_ms'] = max(stats['max_latency_ms'], latency_ms)
+        stats['avg_latency_ms'] += (latency_ms - stats['avg_latency_ms']) / stats['updates']
+        
+        self.drag_target = None
+        self.drag_event_time = None
+        self.drag_last_update = now
 
     def on_mouse_up(self, event):
+        if not self.dragging:
+            return
         self.dragging = False
+        
+        # Догоняем последнюю позицию и только теперь фиксируем относительные координаты
+        if self.drag_timer is not None:
+            self.root.after_cancel(self.drag_timer)
+        self._apply_drag()
+        
+        new_width, new_height = self.page_source.page_size(self.current_page, self.scale_factor)
+        self.sig_x_rel = (self.sig_x - self.offset_x) / new_width
+        self.sig_y_rel = (self.sig_y - self.offset_y) / new_height
 
     def on_mouse_wheel(self, event):
         if event.num == 4 or event.delta > 0: direction = -1
@@ -558,12 +967,12 @@ class PDFSignerApp:
                     self.canvas.yview_scroll(direction, "units")
                     return
         
-        if self.pdf_images:
+        if self.page_source:
             if direction > 0: self.go_next_page()
             elif direction < 0: self.go_prev_page()
 
     def go_next_page(self):
-        if self.current_page < len(self.pdf_images) - 1:
+        if self.page_source and self.current_page < len(self.page_source) - 1:
             self.scroll_effort = 0
             self.current_page += 1
             self.page_var.set(self.current_page + 1)
@@ -605,10 +1014,7 @@ class PDFSignerApp:
             messagebox.showwarning("Предупреждение", "Загрузите PDF")
             return
         
-        if not self.signature_path:
-            messagebox.showwarning("Предупреждение", "Загрузите подпись")
-            return
-        
+        # Каждое размещение хранит свою подпись - отдельная проверка не нужна
         if len(self.placed_signatures) == 0:
             messagebox.showwarning("Предупреждение", "Установите хотя бы одну подпись")
             return
@@ -619,50 +1025,50 @@ class PDFSignerApp:
             filetypes=[("PDF файлы", "*.pdf")]
         )
         if not output_path: return
-        
+
+        # Сохранение поверх открытого файла подменяет его на диске -
+        # фоновая отрисовка старого содержимого на это время останавливается
+        in_place = os.path.abspath(output_path) == os.path.abspath(self.pdf_path)
+        if in_place:
+            self.prefetcher.cancel()
+            self.thumbnails.set_source(None)
+
         try:
-            reader = PdfReader(self.pdf_path)
-            writer = PdfWriter()
-            
-            signatures_by_page = {}
-            for sig in self.placed_signatures:
-                page_idx = sig['page']
-                if page_idx not in signatures_by_page:
-                    signatures_by_page[page_idx] = []
-                signatures_by_page[page_idx].append(sig)
-            
-            for page_idx, page in enumerate(reader.pages):
-                if page_idx in signatures_by_page:
-                    page_width_pt = float(page.mediabox.width)
-                    page_height_pt = float(page.mediabox.height)
-                    
-                    packet = io.BytesIO()
-                    c = canvas.Canvas(packet, pagesize=(page_width_pt, page_height_pt))
-                    
-                    for sig in signatures_by_page[page_idx]:
-                        # Используем относительные координаты для точного позиционирования в PDF
-                        x_pt = sig['x_rel'] * page_width_pt
-                        y_pt = page_height_pt - (sig['y_rel'] + sig['h_rel']) * page_height_pt
-                        w_pt = sig['w_rel'] * page_width_pt
-                        h_pt = sig['h_rel'] * page_height_pt
-                        
-                        c.drawImage(self.signature_path, x_pt, y_pt, width=w_pt, height=h_pt, mask='auto')
-                    
-                    c.showPage()
-                    c.save()
-                    packet.seek(0)
-                    
-                    overlay_reader = PdfReader(packet)
-                    overlay_page = overlay_reader.pages[0]
-                    page.merge_page(overlay_page)
-                
-                writer.add_page(page)
-            
-            with open(output_path, "wb") as f:
-                writer.write(f)
-            
+            placements = [Placement.from_dict(sig, self.signatures.data(sig['signature']))
+                          for sig in self.placed_signatures]
+            # Тот же отображённый в память буфер, из которого рисуются страницы
+            document = self.page_source.document
+            # Большие файлы не собираются в памяти целиком: копия исходника
+            # блоками и дозапись подписанных страниц по одной
+            incremental = self.incremental_save_var.get() or document.size > self.STREAMING_SAVE_BYTES
+            try:
+                SigningEngine().sign(document, placements, output_path,
+                                     incremental=incremental, progress=self._report_save_progress)
+            finally:
+                if in_place:
+                    self._reload_page_source()
+
             messagebox.showinfo("Успех", f"PDF с {len(self.placed_signatures)} подписями сохранён:\n{output_path}")
             self.status_label.config(text=f"Сохранено: {output_path.split('/')[-1].split(chr(92))[-1]}")
         
         except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сохранить PDF:\n{e}")
\ No newline at end of file
+            self.status_label.config(text="Ошибка сохранения")
+            messagebox.showerror("Ошибка", f"Не удалось сохранить PDF:\n{e}")
+
+    def _reload_page_source(self):
+        """Открывает заново файл текущей вкладки после его перезаписи"""
+        self.page_source.reload()
+        self.thumbnails.set_source(self.page_source)
+        if hasattr(self, '_last_state'): del self._last_state
+        self.display_page()
+
+    def _report_save_progress(self, stage, done, total):
+        if stage == "copy":
+            text = f"Копирование: {done * 100 // max(total, 1)}%"
+        elif stage == "stamp":
+            text = f"Подпись страниц: {done}/{total}"
+        else:
+            text = "Запись файла..." if done < total else "Запись завершена"
+        self.status_label.config(text=text)
+        # Сохранение идёт в главном потоке - перерисовываем только строку состояния
+        self.status_label.update_idletasks()
\ No newline at end of file
@@ -1,11 +1,13 @@
 import io
 import sys
+import threading
 import fitz
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk, ImageDraw, ImageEnhance, ImageFilter
+from PIL import Image, ImageTk, ImageDraw
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
+from core import SignaturePipeline
 
 
 class PreviewWindow:
@@ -108,45 +110,26 @@ class PreviewWindow:
         # Кэш для оптимизации
         self.cached_zoom = None
         self.cached_photo = None
-        self.cached_blue_image = {}
-        self.cached_processed = {}
         self.update_timer = None
         
+        # Поэтапный кэш обработки, ключ - содержимое кропа и параметры
+        self.pipeline = SignaturePipeline()
+        self.original_key = SignaturePipeline.content_hash(self.original_cropped)
+        
+        # Прогрессивный предпросмотр: сначала уменьшенная копия, затем полный размер
+        self.display_image = None
+        self.display_factor = 1.0
+        self.proxy_image = None
+        self.render_generation = 0
+        self.pending_full_render = None
+        self.full_render_thread = None
+        self.full_render_lock = threading.Lock()
+        # Закрытие окна отменяет фоновый расчёт: его результат некуда показывать
+        self.window.bind("<Destroy>", self.on_destroy)
+        
         # Первичная обработка
         self.apply_processing()
     
-    def remove_white_background(self, image, brightness_threshold, saturation_threshold, smooth=True):
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.5)
-        
-        img = image.convert("RGBA")
-        data = img.getdata()
-        new_data = []
-        
-        for item in data:
-            r, g, b, a = item
-            brightness = (r + g + b) / 3
-            max_c, min_c = max(r, g, b), min(r, g, b)
-            saturation = max_c - min_c
-            is_blue = (b > r + 5) and (b > g + 5)
-            
-            if brightness > brightness_threshold:
-                new_data.append((255, 255, 255, 0))
-            elif saturation < saturation_threshold and brightness > 120:
-                new_data.append((255, 255, 255, 0))
-            elif is_blue or brightness < 160:
-                new_data.append(item)
-            else:
-                new_data.append((255, 255, 255, 0))
-        
-        img.putdata(new_data)
-        
-        if smooth:
-            img = img.filter(ImageFilter.MedianFilter(size=3))
-            img = img.filter(ImageFilter.SMOOTH)
-        
-        return img
-    
     def on_processing_change(self, value=None):
         if self.update_timer:
             self.window.after_cancel(self.update_timer)
@@ -154,76 +137,92 @@ class PreviewWindow:
         self.update_timer = self.window.after(150, self.apply_processing)
     
     def apply_processing(self):
-        cache_key = (self.threshold_var.get(), self.saturation_var.get(), self.smooth_var.get())
-        
-        if cache_key in self.cached_processed:
-            base_processed = self.cached_processed[cache_key].copy()
+        self.update_timer = None
+        params = (self.threshold_var.get(), self.saturation_var.get(), 
+                  self.smooth_var.get(), self.blue_intensity)
+        self.render_generation += 1
+        
+        factor = self.get_proxy_factor()
+        if factor < 1.0:
+            # Мгновенный результат на уменьшенной копии, полный размер - в фоне
+            self.show_result(self.process_image(factor, *params), factor)
+            self.processed_image = None
+            self.start_full_render(self.render_generation, params)
         else:
-            base_processed = self.remove_white_background(
-                self.original_cropped,
-                self.threshold_var.get(),
-                self.saturation_var.get(),
-                self.smooth_var.get()
-            )
-            if len(self.cached_processed) > 5:
-                self.cached_processed.clear()
-            self.cached_processed[cache_key] = base_processed.copy()
-        
-        self.processed_image = self.make_more_blue(base_processed, self.blue_intensity)
+            self.processed_image = self.process_image(1.0, *params)
+            self.show_result(self.processed_image, 1.0)
+    
+    def process_image(self, factor, threshold, saturation, smooth, blue_intensity):
+        if factor < 1.0:
+            # Превью однозначно задаётся оригиналом и коэффициентом уменьшения
+            image, key = self.get_proxy(factor), (self.original_key, factor)
+        else:
+            image, key = self.original_cropped, self.original_key
+        return self.pipeline.run(image, threshold, saturation, smooth, blue_intensity, key=key)
+    
+    def get_proxy_factor(self):
+        """Во сколько раз можно уменьшить оригинал, не теряя видимых деталей"""
+        viewport = max(self.canvas.winfo_width(), self.canvas.winfo_height())
+        if viewport <= 1:
+            viewport = 800
+        longest = max(self.original_cropped.width, self.original_cropped.height)
+        return min(1.0, self.zoom_level, viewport / longest)
+    
+    def get_proxy(self, factor):
+        if self.proxy_image is None or self.proxy_image[0] != factor:
+            width = max(1, int(self.original_cropped.width * factor))
+            height = max(1, int(self.original_cropped.height * factor))
+            proxy = self.original_cropped.resize((width, height), Image.Resampling.BILINEAR)
+            self.proxy_image = (factor, proxy)
+        return self.proxy_image[1]
+    
+    def show_result(self, image, factor):
+        self.display_image = image
+        self.display_factor = factor
         self.cached_zoom = None
         self.update_display()
     
-    def make_more_blue(self, image, intensity):
-        if intensity <= 0:
-            return image.copy()
-
-        ALPHA_MIN = 240
-        BR_MAX = 110
-        GAMMA = 1.8
-        INK_BLUE = (15, 45, 220)
-
-        cache_key = (id(image), intensity)
-        if cache_key in self.cached_blue_image:
-            return self.cached_blue_image[cache_key].copy()
-
-        blue_factor = intensity / 100.0
-
-        img = image.convert("RGBA")
-        data = img.getdata()
-        new_data = []
-
-        for (r, g, b, a) in data:
-            if a < ALPHA_MIN:
-                new_data.append((r, g, b, a))
-                continue
-
-            br = (r + g + b) / 3.0
-            if br > BR_MAX:
-                new_data.append((r, g, b, a))
-                continue
-
-            dark = (BR_MAX - br) / BR_MAX
-            dark = max(0.0, min(1.0, dark))
-            strength = blue_factor * (dark ** GAMMA)
-
-            nr = int(r * (1.0 - strength) + INK_BLUE[0] * strength)
-            ng = int(g * (1.0 - strength) + INK_BLUE[1] * strength)
-            nb = int(b * (1.0 - strength) + INK_BLUE[2] * strength)
-
-            new_data.append((
-                max(0, min(255, nr)),
-                max(0, min(255, ng)),
-                max(0, min(255, nb)),
-                a
-            ))
-
-        img.putdata(new_data)
-
-        if len(self.cached_blue_image) > 10:
-            self.cached_blue_image.clear()
-        self.cached_blue_image[cache_key] = img.copy()
-
-        return img
+    def start_full_render(self, generation, params):
+        # Один фоновый поток всегда считает только последние параметры
+        with self.full_render_lock:
+            self.pending_full_render = (generation, params)
+            if self.full_render_thread is None:
+                self.full_render_thread = threading.Thread(target=self.full_render_loop, daemon=True)
+                self.full_render_thread.start()
+    
+    def full_render_loop(self):
+        while True:
+            with self.full_render_lock:
+                job = self.pending_full_render
+                self.pending_full_render = None
+                if job is None:
+                    self.full_render_thread = None
+                    return
+            
+            generation, params = job
+            result = self.process_image(1.0, *params)
+            try:
+                self.window.after(0, self.on_full_render_ready, generation, result)
+            except (tk.TclError, RuntimeError):
+                # Окно уже закрыто
+                return
+    
+    def on_destroy(self, event):
+        # <Destroy> приходит и от дочерних виджетов - нужен только сам Toplevel
+        if event.widget is not self.window:
+            return
+        self.render_generation += 1
+        if self.update_timer:
+            self.window.after_cancel(self.update_timer)
+            self.update_timer = None
+        with self.full_render_lock:
+            self.pending_full_render = None
+    
+    def on_full_render_ready(self, generation, result):
+        if generation != self.render_generation or not self.window.winfo_exists():
+            return
+        self.processed_image = result
+        self.show_result(result, 1.0)
     
     def on_blue_change(self, value):
         intensity = int(float(value))
@@ -244,22 +243,7 @@ class PreviewWindow:
         self.update_timer = self.window.after(150, self.apply_blue_correction)
     
     def apply_blue_correction(self):
-        cache_key = (self.threshold_var.get(), self.saturation_var.get(), self.smooth_var.get())
-        
-        if cache_key in self.cached_processed:
-            base_processed = self.cached_processed[cache_key].copy()
-        else:
-            base_processed = self.remove_white_background(
-                self.original_cropped,
-                self.threshold_var.get(),
-                self.saturation_var.get(),
-                self.smooth_var.get()
-            )
-            self.cached_processed[cache_key] = base_processed.copy()
-        
-        self.processed_image = self.make_more_blue(base_processed, self.blue_intensity)
-        self.cached_zoom = None
-        self.update_display()
+        self.apply_processing()
     
     def reset_all(self):
         self.blue_var.set(0)
@@ -268,8 +252,6 @@ class PreviewWindow:
         self.saturation_var.set(50)
         self.smooth_var.set(True)
         self.color_info.config(text="Оригинал")
-        self.cached_blue_image.clear()
-        self.cached_processed.clear()
         self.apply_processing()
     
     def create_checkered_background(self, width, height):
@@ -285,21 +267,22 @@ class PreviewWindow:
         return bg
     
     def update_display(self):
-        if not self.processed_image:
+        if not self.display_image:
             return
             
         if self.cached_zoom == self.zoom_level and self.cached_photo:
             return
         
-        width = int(self.processed_image.width * self.zoom_level)
-        height = int(self.processed_image.height * self.zoom_level)
+        # Размер на экране считаем от оригинала - превью растягивается до него же
+        width = int(self.original_cropped.width * self.zoom_level)
+        height = int(self.original_cropped.height * self.zoom_level)
         
-        if self.zoom_level < 1.0:
+        if self.zoom_level < self.display_factor:
             resample = Image.Resampling.BILINEAR
         else:
             resample = Image.Resampling.LANCZOS
         
-        scaled_img = self.processed_image.resize((width, height), resample)
+        scaled_img = self.display_image.resize((width, height), resample)
         
         bg = self.create_checkered_background(width + 40, height + 40)
         bg.paste(scaled_img, (20, 20), scaled_img)
@@ -336,6 +319,12 @@ class PreviewWindow:
         
         if save_path:
             try:
+                if self.processed_image is None:
+                    # Фоновый расчёт полного размера ещё не завершён - считаем сразу
+                    params = (self.threshold_var.get(), self.saturation_var.get(), 
+                              self.smooth_var.get(), self.blue_intensity)
+                    self.render_generation += 1
+                    self.processed_image = self.process_image(1.0, *params)
                 self.processed_image.save(save_path, "PNG")
                 
                 color_note = ""
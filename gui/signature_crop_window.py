@@ -3,7 +3,7 @@ import sys
 import fitz
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk, ImageDraw, ImageEnhance, ImageFilter
+from PIL import Image, ImageTk, ImageDraw
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
 from .preview_window import PreviewWindow
@@ -159,38 +159,6 @@ class SignatureCropWindow:
             int(y2 / self.zoom_level)
         )
 
-    def remove_white_background(self, image, brightness_threshold, saturation_threshold, smooth=True):
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.5)
-        
-        img = image.convert("RGBA")
-        data = img.getdata()
-        new_data = []
-        
-        for item in data:
-            r, g, b, a = item
-            brightness = (r + g + b) / 3
-            max_c, min_c = max(r, g, b), min(r, g, b)
-            saturation = max_c - min_c
-            is_blue = (b > r + 5) and (b > g + 5)
-            
-            if brightness > brightness_threshold:
-                new_data.append((255, 255, 255, 0))
-            elif saturation < saturation_threshold and brightness > 120:
-                new_data.append((255, 255, 255, 0))
-            elif is_blue or brightness < 160:
-                new_data.append(item)
-            else:
-                new_data.append((255, 255, 255, 0))
-        
-        img.putdata(new_data)
-        
-        if smooth:
-            img = img.filter(ImageFilter.MedianFilter(size=3))
-            img = img.filter(ImageFilter.SMOOTH)
-        
-        return img
-
     def show_preview(self):
         if not self.selection_coords_orig:
             messagebox.showwarning("Внимание", "Сначала выделите область!")
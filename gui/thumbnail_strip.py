@@ -0,0 +1,204 @@
+import tkinter as tk
+from tkinter import ttk
+from PIL import ImageTk
+from core import BitmapCache, ThumbnailWorker
+
+
+class ThumbnailStrip:
+    """Боковая лента миниатюр страниц.
+
+    Лента виртуализирована: PhotoImage существуют только для видимых слотов
+    (плюс небольшой запас), остальные миниатюры лежат в памяти как PIL-растры
+    и на диске. Страницы с установленными подписями отмечаются значком.
+    """
+    THUMB_BOX = (96, 128)
+    SLOT_HEIGHT = 156
+    PADDING = 8
+    # Сколько слотов за краем видимой области держать готовыми
+    OVERSCAN = 2
+    CACHE_BYTES = 32 * 1024 * 1024
+
+    BG = "#3c3f41"
+    FRAME_COLOR = "#5f6366"
+    CURRENT_COLOR = "#3498db"
+    MARKED_COLOR = "#27ae60"
+
+    def __init__(self, parent, on_select, disk_cache=None):
+        self.on_select = on_select
+        self.source = None
+        self.current_page = None
+        self.marked_pages = frozenset()
+
+        # Растры миниатюр по (source_id, страница)
+        self.images = BitmapCache(max_bytes=self.CACHE_BYTES)
+        # Видимые слоты: страница -> {'photo', 'frame', 'image', 'badge'}
+        self.slots = {}
+        self.refresh_pending = False
+
+        self.frame = ttk.Frame(parent)
+        self.width = self.THUMB_BOX[0] + 2 * self.PADDING
+        self.canvas = tk.Canvas(self.frame, width=self.width, bg=self.BG, highlightthickness=0)
+        self.v_scroll = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.Y, expand=True)
+
+        self.worker = ThumbnailWorker(lambda callback: self.canvas.after(0, callback), disk_cache)
+
+        self.canvas.bind("<Configure>", lambda e: self.schedule_refresh())
+        self.canvas.bind("<ButtonPress-1>", self.on_click)
+        self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self.on_mouse_wheel)
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_source(self, source):
+        """Показывает миниатюры нового документа (None - очистить ленту)"""
+        self.worker.cancel()
+        if self.source is not None:
+            source_id = self.source.source_id
+            self.images.discard_if(lambda key: key[0] == source_id)
+
+        self.source = source
+        self.current_page = None
+        self.marked_pages = frozenset()
+        self._clear_slots()
+
+        pages = len(source) if source else 0
+        self.canvas.configure(scrollregion=(0, 0, self.width, pages * self.SLOT_HEIGHT))
+        self.canvas.yview_moveto(0)
+        self.schedule_refresh()
+
+    def set_current(self, index):
+        if index == self.current_page:
+            return
+        previous, self.current_page = self.current_page, index
+        self._style_slot(previous)
+        self._style_slot(index)
+        self._ensure_visible(index)
+
+    def set_marked(self, pages):
+        pages = frozenset(pages)
+        if pages == self.marked_pages:
+            return
+        changed = pages ^ self.marked_pages
+        self.marked_pages = pages
+        for index in changed:
+            self._style_slot(index)
+
+    def on_scroll(self, *args):
+        self.v_scroll.set(*args)
+        self.schedule_refresh()
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, "units")
+        else:
+            self.canvas.yview_scroll(1, "units")
+
+    def on_click(self, event):
+        if not self.source:
+            return
+        index = int(self.canvas.canvasy(event.y) // self.SLOT_HEIGHT)
+        if 0 <= index < len(self.source):
+            self.on_select(index)
+
+    def schedule_refresh(self):
+        # Прокрутка присылает десятки событий - пересчитываем слоты раз за цикл
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def refresh(self):
+        """Создаёт слоты для видимых страниц и удаляет ушедшие за край"""
+        self.refresh_pending = False
+        if not self.source:
+            return
+
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(max(self.canvas.winfo_height(), 1))
+        first = max(0, int(top // self.SLOT_HEIGHT) - self.OVERSCAN)
+        last = min(len(self.source) - 1, int(bottom // self.SLOT_HEIGHT) + self.OVERSCAN)
+        visible = range(first, last + 1)
+
+        for index in [index for index in self.slots if index not in visible]:
+            self._delete_slot(index)
+
+        missing = []
+        for index in visible:
+            if index not in self.slots:
+                self._create_slot(index)
+            if self.slots[index]['photo'] is None:
+                missing.append(index)
+
+        if missing:
+            self.worker.schedule(self.source, missing, self.THUMB_BOX, self._on_thumbnail_ready)
+
+    def _on_thumbnail_ready(self, source, index, img):
+        if source is not self.source:
+            return
+        self.images.put((source.source_id, index), img)
+        if index in self.slots:
+            self._set_slot_image(index, img)
+
+    def _slot_origin(self, index):
+        return self.PADDING, index * self.SLOT_HEIGHT + self.PADDING
+
+    def _create_slot(self, index):
+        x, y = self._slot_origin(index)
+        box_w, box_h = self.THUMB_BOX
+        slot = {'photo': None}
+        slot['frame'] = self.canvas.create_rectangle(x - 2, y - 2, x + box_w + 2, y + box_h + 2,
+                                                     fill="#2b2b2b")
+        slot['image'] = self.canvas.create_image(x + box_w // 2, y + box_h // 2, anchor=tk.CENTER)
+        slot['label'] = self.canvas.create_text(x + box_w // 2, y + box_h + 12, text=str(index + 1),
+                                                fill="white", font=("Segoe UI", 8))
+        slot['badge'] = self.canvas.create_text(x + box_w - 4, y + 4, anchor=tk.NE, text="✍",
+                                                fill=self.MARKED_COLOR, font=("Segoe UI", 12, "bold"),
+                                                state=tk.HIDDEN)
+        self.slots[index] = slot
+        self._style_slot(index)
+
+        img = self.images.get((self.source.source_id, index))
+        if img is not None:
+            self._set_slot_image(index, img)
+
+    def _set_slot_image(self, index, img):
+        slot = self.slots[index]
+        slot['photo'] = ImageTk.PhotoImage(img)
+        self.canvas.itemconfig(slot['image'], image=slot['photo'])
+
+    def _style_slot(self, index):
+        slot = self.slots.get(index)
+        if slot is None:
+            return
+
+        if index == self.current_page:
+            outline, width = self.CURRENT_COLOR, 3
+        elif index in self.marked_pages:
+            outline, width = self.MARKED_COLOR, 2
+        else:
+            outline, width = self.FRAME_COLOR, 1
+        self.canvas.itemconfig(slot['frame'], outline=outline, width=width)
+        self.canvas.itemconfig(slot['badge'],
+                               state=tk.NORMAL if index in self.marked_pages else tk.HIDDEN)
+
+    def _ensure_visible(self, index):
+        if index is None or not self.source:
+            return
+        top = self.canvas.canvasy(0)
+        bottom = self.canvas.canvasy(max(self.canvas.winfo_height(), 1))
+        slot_top = index * self.SLOT_HEIGHT
+        if slot_top < top or slot_top + self.SLOT_HEIGHT > bottom:
+            self.canvas.yview_moveto(slot_top / (len(self.source) * self.SLOT_HEIGHT))
+
+    def _delete_slot(self, index):
+        slot = self.slots.pop(index)
+        for name in ('frame', 'image', 'label', 'badge'):
+            self.canvas.delete(slot[name])
+
+    def _clear_slots(self):
+        for index in list(self.slots):
+            self._delete_slot(index)
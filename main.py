@@ -1,10 +1,13 @@
 """
 Точка входа в приложение PDF Signature Tool
 """
+import multiprocessing
 import tkinter as tk
 from gui import PDFSignerApp
 
 if __name__ == "__main__":
+    # Нужно для пула процессов обработки подписи в собранном .exe
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = PDFSignerApp(root)
     root.mainloop()
@@ -20,9 +20,12 @@ build_exe_options = {
         "os",
         "tkinter",
         "PIL",
+        "numpy",
         "PyPDF2",
         "reportlab",
         "pdf2image",
+        # Подмодули core импортируются лениво - анализатор импортов их не видит
+        "core",
     ],
     "include_files": include_files,
 }
@@ -40,6 +43,13 @@ setup(
             main_script,
             base=base,
             icon=icon_file
+        ),
+        # Консольная утилита для пакетной подписи
+        Executable(
+            "cli.py",
+            base=None,
+            target_name="pdf-signer",
+            icon=icon_file
         )
     ]
 )